@@ -0,0 +1,110 @@
+"""
+bench_json - compare decoding a large result envelope in one go against streaming it
+
+Decodes a generated {"data": [...], "meta": {...}} body with every installed codec and with
+JSONStream, consuming items one at a time, and reports decode time and peak memory.
+
+    python benchmarks/bench_json.py [--items 100000] [--json]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stackdriver.jsonstream import JSONStream, DEFAULT_CHUNK_SIZE
+
+
+def make_body(count):
+    data = [{'id': i,
+             'resource': '/v0.2/instances/%d/' % i,
+             'name': 'web-%d' % i,
+             'tags': {'environment': 'production', 'role': 'web'},
+             'zone': 'us-east-1a'} for i in range(count)]
+    return json.dumps({'data': data, 'meta': {'total': count}}).encode('utf-8')
+
+
+def chunked(body, size=DEFAULT_CHUNK_SIZE):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def decode_whole(codec):
+    def run(body):
+        count = 0
+        for item in codec.loads(body)['data']:
+            count += 1
+        return count
+    return run
+
+
+def decode_stream(body):
+    count = 0
+    for item in JSONStream(chunked(body))['data']:
+        count += 1
+    return count
+
+
+def measure(func, body):
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    start = time.time()
+    count = func(body)
+    elapsed = time.time() - start
+
+    peak = None
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    # time again without tracemalloc overhead
+    start = time.time()
+    func(body)
+    elapsed = min(elapsed, time.time() - start)
+
+    return {'items': count, 'seconds': round(elapsed, 4), 'peak_bytes': peak}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--json', action='store_true', help='print machine readable results')
+    args = parser.parse_args(argv)
+
+    body = make_body(args.items)
+
+    cases = [('json (whole body)', decode_whole(json))]
+    for name in ('simplejson', 'ujson', 'orjson'):
+        try:
+            cases.append(('%s (whole body)' % name, decode_whole(importlib.import_module(name))))
+        except ImportError:
+            pass
+    cases.append(('JSONStream', decode_stream))
+
+    results = {}
+    for name, func in cases:
+        results[name] = measure(func, body)
+
+    if args.json:
+        print(json.dumps({'body_bytes': len(body), 'results': results}, indent=2, sort_keys=True))
+        return
+
+    print('body: %d bytes, %d items' % (len(body), args.items))
+    for name, _ in cases:
+        result = results[name]
+        peak = '%.1f MB' % (result['peak_bytes'] / 1e6) if result['peak_bytes'] is not None else 'n/a'
+        print('%-22s %8.3fs  peak %s' % (name, result['seconds'], peak))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+fakeserver - a local stand-in for the Stackdriver API used by the benchmarks
+
+Serves versioned endpoints (/v0.2/<collection>/ and /v0.2/<collection>/<id>/) with the
+same {"data": ..., "meta": ...} envelopes as the real API.  Every collection holds the
+same generated resources, lists are paginated with page/per_page and the meta block
+carries page, pages and total.
+
+The tests also use it: every call is recorded in request_log, script() makes the next
+calls to a path answer with given statuses, headers and bodies, and with etags=True GETs
+carry an ETag and are answered 304 when If-None-Match matches.  Request bodies sent
+with a gzip or deflate Content-Encoding are decoded, and with compress=True responses
+are gzipped for clients accepting it.
+
+    python benchmarks/fakeserver.py --port 8080 --items 10000
+"""
+
+import argparse
+from collections import deque, namedtuple
+import hashlib
+import json
+import threading
+import time
+import zlib
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+DEFAULT_ITEMS = 10000
+DEFAULT_PER_PAGE = 1000
+
+LoggedRequest = namedtuple('LoggedRequest', 'method path query headers body')
+
+# zlib window bits decoding a gzip or a zlib (http deflate) stream
+_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+
+def make_resource(collection, version, id):
+    return {
+        'id': id,
+        'resource': '/v%s/%s/%d/' % (version, collection, id),
+        'name': 'web-%d' % id,
+        'parent_id': id // 10 or None,
+        'tags': {'environment': 'production', 'role': 'web'},
+        'zone': 'us-east-1a',
+        'created_epoch': 1390000000 + id,
+    }
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # send headers and body in one write and without Nagle delays so the
+    # server does not add latency of its own to the numbers
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _parse(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if not parts or not parts[0].startswith('v'):
+            return None, None, None, {}
+
+        version = parts[0][1:]
+        collection = '/'.join(part for part in parts[1:] if not part.isdigit())
+        ids = [int(part) for part in parts[1:] if part.isdigit()]
+        query = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        return version, collection, ids[-1] if ids else None, query
+
+    def _read_body(self):
+        length = int(self.headers.get('content-length') or 0)
+        if not length:
+            return None
+        body = self.rfile.read(length)
+        encoding = self.headers.get('content-encoding')
+        if encoding in _WBITS:
+            body = zlib.decompress(body, _WBITS[encoding])
+        return json.loads(body.decode('utf-8'))
+
+    def _send(self, data, meta=None, status=200, headers=None):
+        body = json.dumps({'data': data, 'meta': meta or {}}).encode('utf-8')
+
+        etag = None
+        if self.server.etags and self.command == 'GET' and status == 200:
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get('if-none-match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+        encoding = None
+        if self.server.compress and 'gzip' in (self.headers.get('accept-encoding') or ''):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, _WBITS['gzip'])
+            body = compressor.compress(body) + compressor.flush()
+            encoding = 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _begin(self):
+        """ record the call and wait out the latency, return True if a scripted answer was sent """
+        url = urlparse(self.path)
+        query = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        # read once here so scripted answers leave the connection ready for the next call
+        self.body = self._read_body()
+        self.server.log(LoggedRequest(self.command, url.path, query, dict((k.lower(), v) for k, v in self.headers.items()), self.body))
+        self._delay()
+
+        response = self.server.next_response(self.command, url.path)
+        if response is None:
+            return False
+
+        if response.get('delay'):
+            time.sleep(response['delay'])
+        self._send(response.get('data'), response.get('meta'), status=response.get('status', 200), headers=response.get('headers'))
+        return True
+
+    def do_GET(self):
+        if self._begin():
+            return
+        version, collection, id, query = self._parse()
+        if version is None:
+            return self._send(None, {'error': 'Not Found'}, status=404)
+
+        if id is not None:
+            return self._send(make_resource(collection, version, id))
+
+        total = self.server.items
+        per_page = int(query.get('per_page', self.server.per_page))
+        page = int(query.get('page', 1))
+        pages = max(1, (total + per_page - 1) // per_page)
+
+        start = (page - 1) * per_page
+        data = [make_resource(collection, version, i) for i in range(start, min(start + per_page, total))]
+        self._send(data, {'page': page, 'pages': pages, 'per_page': per_page, 'total': total})
+
+    def do_POST(self):
+        if self._begin():
+            return
+        version, collection, id, query = self._parse()
+        data = self.body or {}
+
+        if collection == 'resolve':
+            name = data.get('name', '')
+            return self._send([make_resource('instances', version, abs(hash(name)) % 100000)])
+
+        data = dict(data)
+        data.setdefault('id', self.server.next_id())
+        data['resource'] = '/v%s/%s/%d/' % (version, collection, data['id'])
+        self._send(data)
+
+    def do_PUT(self):
+        if self._begin():
+            return
+        version, collection, id, query = self._parse()
+        data = dict(self.body or {})
+        data['resource'] = '/v%s/%s/%d/' % (version, collection, id)
+        self._send(data)
+
+    def do_DELETE(self):
+        if self._begin():
+            return
+        version, collection, id, query = self._parse()
+        self._send({'id': id, 'resource': '/v%s/%s/%d/' % (version, collection, id), 'deleted_epoch': int(time.time())})
+
+
+class FakeApiServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), items=DEFAULT_ITEMS, per_page=DEFAULT_PER_PAGE, latency=0, etags=False, compress=False):
+        """
+        :param items: number of resources in every collection
+        :param per_page: default page size of list calls
+        :param latency: seconds to sleep before answering each call
+        :param etags: send an ETag with GET responses and answer 304 to a matching If-None-Match
+        :param compress: gzip responses to clients sending Accept-Encoding: gzip
+        """
+        HTTPServer.__init__(self, address, FakeApiHandler)
+        self.items = items
+        self.per_page = per_page
+        self.latency = latency
+        self.etags = etags
+        self.compress = compress
+
+        self.request_log = []
+        self._scripts = {}
+        self._lock = threading.Lock()
+
+        self._id_lock = threading.Lock()
+        self._last_id = 1000000
+
+    def script(self, method, path, *responses):
+        """
+        Answer the next calls to method path with responses, one each, then go back to normal
+
+            server.script('GET', '/v0.2/groups/', {'status': 429, 'headers': {'Retry-After': '0'}})
+
+        :param responses: dicts with any of status, headers, data, meta and delay (seconds)
+        """
+        with self._lock:
+            self._scripts.setdefault((method, path), deque()).extend(responses)
+
+    def next_response(self, method, path):
+        with self._lock:
+            responses = self._scripts.get((method, path))
+            if responses:
+                return responses.popleft()
+        return None
+
+    def log(self, request):
+        with self._lock:
+            self.request_log.append(request)
+
+    def requests_to(self, method, path):
+        """ the logged calls to method path """
+        with self._lock:
+            return [request for request in self.request_log if request.method == method and request.path == path]
+
+    def reset(self):
+        """ forget scripted responses and logged calls """
+        with self._lock:
+            self._scripts.clear()
+            del self.request_log[:]
+
+    def next_id(self):
+        with self._id_lock:
+            self._last_id += 1
+            return self._last_id
+
+    @property
+    def url(self):
+        return 'http://%s:%d/' % self.server_address[:2]
+
+    def start(self):
+        """ serve on a background thread and return self """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS)
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE)
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every call')
+    args = parser.parse_args(argv)
+
+    server = FakeApiServer((args.host, args.port), items=args.items, per_page=args.per_page, latency=args.latency)
+    print('serving on %s' % server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
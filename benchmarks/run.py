@@ -0,0 +1,267 @@
+"""
+run - client benchmark suite against a local fake Stackdriver API
+
+Starts benchmarks/fakeserver.py in-process and measures the client: throughput and latency
+percentiles of RestApi.get/post (sequential and from threads), the cost of the StackApi
+attribute chain, wrapping large list results, paging through a large collection and bulk
+fetches, with peak memory where it matters.
+
+Results are written as JSON so runs can be compared across versions:
+
+    python benchmarks/run.py --output before.json
+    ... change things ...
+    python benchmarks/run.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import stackdriver
+from stackdriver import StackApi
+from stackdriver.restapi import RestApi
+
+from fakeserver import FakeApiServer, make_resource
+import bench_json
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def pick(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    return {
+        'p50_ms': round(pick(0.50) * 1000, 3),
+        'p90_ms': round(pick(0.90) * 1000, 3),
+        'p99_ms': round(pick(0.99) * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3),
+    }
+
+
+def timed_calls(func, count, threads=1):
+    """ call func count times spread over threads, returns throughput and latency percentiles """
+    latencies = []
+    lock = threading.Lock()
+    per_thread = count // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            start = time.time()
+            func()
+            local.append(time.time() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.time()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    elapsed = time.time() - start
+
+    result = {'calls': len(latencies), 'threads': threads, 'seconds': round(elapsed, 4),
+              'calls_per_second': round(len(latencies) / elapsed, 1)}
+    result.update(percentiles(latencies))
+    return result
+
+
+def with_peak_memory(func):
+    """ run func and return (result, peak traced bytes or None) """
+    if tracemalloc is None:
+        return func(), None
+
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_rest(server, args):
+    results = {}
+    client = RestApi(server.url, StackApi.API_VERSION, 'benchmark', pool_maxsize=args.threads)
+    endpoint = 'v%s/groups/1/' % StackApi.API_VERSION
+
+    # warm the connection pool
+    client.get(endpoint)
+
+    results['rest_get_sequential'] = timed_calls(lambda: client.get(endpoint), args.calls)
+    results['rest_get_concurrent'] = timed_calls(lambda: client.get(endpoint), args.calls, threads=args.threads)
+
+    payload = {'name': 'benchmark', 'conjunction': 'And', 'conditions': [{'type': 'name', 'comparison': 'starts_with', 'value': 'web'}]}
+    collection = 'v%s/groups/' % StackApi.API_VERSION
+    results['rest_post_sequential'] = timed_calls(lambda: client.post(collection, data=payload), args.calls)
+    results['rest_post_concurrent'] = timed_calls(lambda: client.post(collection, data=payload), args.calls, threads=args.threads)
+
+    client.close()
+    return results
+
+
+def bench_attr_chain(args):
+    api = StackApi('http://localhost/', apikey='benchmark')
+    number = 100000
+    seconds = min(timeit.repeat(lambda: api.Alerting.Maintenance.Resources, number=number, repeat=3))
+    return {'attr_chain': {'calls': number, 'us_per_call': round(seconds / number * 1e6, 3)}}
+
+
+def bench_wrap(args):
+    api = StackApi('http://localhost/', apikey='benchmark')
+    interface = api.Instances
+
+    def wrap_first():
+        data = [make_resource('instances', StackApi.API_VERSION, i) for i in range(args.items)]
+        start = time.time()
+        objs = interface._wrap_rest_data(data)
+        objs[0]
+        return time.time() - start
+
+    def wrap_all():
+        data = [make_resource('instances', StackApi.API_VERSION, i) for i in range(args.items)]
+        start = time.time()
+        objs = interface._wrap_rest_data(data)
+        for obj in objs:
+            pass
+        return time.time() - start, objs
+
+    first_seconds = wrap_first()
+    all_seconds, objs = wrap_all()
+    del objs
+    _, peak = with_peak_memory(wrap_all)
+
+    return {'wrap_rest_data': {'items': args.items,
+                               'first_item_seconds': round(first_seconds, 4),
+                               'all_items_seconds': round(all_seconds, 4),
+                               'peak_bytes': peak}}
+
+
+def bench_list(server, args):
+    results = {}
+    api = StackApi(server.url, apikey='benchmark')
+
+    for name, kwargs in (('list_pages', {}),
+                         ('list_pages_prefetch', {'prefetch': True}),
+                         ('list_pages_stream', {'stream': True})):
+        def scan():
+            count = 0
+            for item in api.Instances.LIST(**kwargs):
+                count += 1
+            return count
+
+        start = time.time()
+        count, peak = with_peak_memory(scan)
+        results[name] = {'items': count, 'seconds': round(time.time() - start, 4), 'peak_bytes': peak}
+
+    api.close()
+    return results
+
+
+def bench_fetch_many(server, args):
+    results = {}
+    api = StackApi(server.url, apikey='benchmark', pool_maxsize=args.threads)
+    paths = ['/v%s/instances/%d/' % (StackApi.API_VERSION, i) for i in range(args.calls)]
+
+    start = time.time()
+    for path in paths:
+        api._rest_client.get(path)
+    results['rehydrate_sequential'] = {'items': len(paths), 'seconds': round(time.time() - start, 4)}
+
+    start = time.time()
+    api.fetch_many(paths, concurrency=args.threads)
+    results['rehydrate_fetch_many'] = {'items': len(paths), 'concurrency': args.threads, 'seconds': round(time.time() - start, 4)}
+
+    api.close()
+    return results
+
+
+def bench_decode(args):
+    body = bench_json.make_body(args.items)
+    return {'decode_whole_body': bench_json.measure(bench_json.decode_whole(json), body),
+            'decode_stream': bench_json.measure(bench_json.decode_stream, body)}
+
+
+def compare(results, baseline):
+    """ print the relative change of every timing against a previous run """
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        for key in sorted(results[name]):
+            new = results[name][key]
+            old = baseline[name].get(key)
+            if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if not (key.endswith('seconds') or key.endswith('_ms') or key.endswith('_bytes') or key.startswith('us_') or key == 'calls_per_second'):
+                continue
+            print('%-26s %-20s %12s -> %-12s %+7.1f%%' % (name, key, old, new, (new - old) * 100.0 / old))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=1000, help='calls per network benchmark')
+    parser.add_argument('--threads', type=int, default=16, help='threads for the concurrent benchmarks')
+    parser.add_argument('--items', type=int, default=50000, help='size of the large list')
+    parser.add_argument('--latency', type=float, default=0, help='seconds the fake server adds to every call')
+    parser.add_argument('--only', action='append', help='only run these groups: rest, attr, wrap, list, bulk, decode')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='a previous JSON result file to compare against')
+    args = parser.parse_args(argv)
+
+    server = FakeApiServer(items=args.items, latency=args.latency).start()
+
+    groups = [('rest', lambda: bench_rest(server, args)),
+              ('attr', lambda: bench_attr_chain(args)),
+              ('wrap', lambda: bench_wrap(args)),
+              ('list', lambda: bench_list(server, args)),
+              ('bulk', lambda: bench_fetch_many(server, args)),
+              ('decode', lambda: bench_decode(args))]
+
+    results = {}
+    try:
+        for name, func in groups:
+            if args.only and name not in args.only:
+                continue
+            sys.stderr.write('running %s benchmarks\n' % name)
+            results.update(func())
+    finally:
+        server.stop()
+
+    report = {
+        'client_version': stackdriver.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': int(time.time()),
+        'settings': {'calls': args.calls, 'threads': args.threads, 'items': args.items, 'latency': args.latency},
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)['results'])
+
+
+if __name__ == '__main__':
+    main()
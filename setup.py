@@ -30,6 +30,14 @@ setup(
     package_data={'': ['LICENSE']},
     package_dir={'stackdriver': 'stackdriver'},
     install_requires=requires,
+    extras_require={
+        'async': ['aiohttp>=3.0'],
+    },
+    entry_points={
+        'console_scripts': [
+            'stackdriver-export = stackdriver.export:main',
+        ],
+    },
     license=license,
     classifiers=(
         'Development Status :: 3 - Alpha',
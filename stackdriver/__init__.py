@@ -1,3 +1,3 @@
 __version__ = '0.2'
 
-from stackapi import StackApi
+from .stackapi import StackApi
@@ -0,0 +1,408 @@
+"""
+asyncapi - asyncio interface to the Stackdriver API
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+Requires python 3.5+ and aiohttp (pip install stackdriver[async])
+"""
+
+import asyncio
+import os
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from . import __version__
+
+from .restapi import RestApi, transport_func, DEFAULT_POOL_MAXSIZE
+from .stackapi import StackApi, AnonStackInterface, AnonStackObject
+from .resultset import next_page
+from .bulk import BulkResult
+
+import logging
+logger = logging.getLogger(__name__)
+
+# maximum number of requests in flight at once for a single client
+DEFAULT_CONCURRENCY = 100
+
+
+async def run_bulk_async(func, items, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Await func on each item with at most concurrency calls pending, see bulk.run_bulk
+
+    :return: a list of BulkResults in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(index, item):
+        async with semaphore:
+            try:
+                return BulkResult(index, item, await func(item), None)
+            except Exception as e:
+                logger.debug('bulk call failed for %r: %s', item, e)
+                return BulkResult(index, item, None, e)
+
+    return list(await asyncio.gather(*[call(index, item) for index, item in enumerate(items)]))
+
+
+class AsyncRestApi(RestApi):
+
+    def __init__(self, entrypoint_uri, version=None, apikey=None, username=None, password=None, useragent=None, transport_controller=None, transport_userdata=None,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, keep_alive=True, concurrency=DEFAULT_CONCURRENCY, json_codec=None, timeout=None):
+        """
+        asyncio version of RestApi, the get, post, put and delete methods are coroutines
+
+        All calls share one aiohttp connection pool which is created lazily inside the running
+        event loop.  At most concurrency calls are in flight at once, the rest wait their turn.
+
+        :param pool_maxsize: maximum number of connections kept open per host
+        :param concurrency: maximum number of requests in flight at once
+        :param transport_controller: if defined it must be a coroutine function, it is awaited
+            in place of each network call
+        :param timeout: default timeout of every call in seconds, or a (connect, read) tuple
+
+        See RestApi for the rest of the parameters
+        """
+        if aiohttp is None:
+            raise ImportError('aiohttp is required for the asyncio interface, install it with: pip install stackdriver[async]')
+
+        super(AsyncRestApi, self).__init__(entrypoint_uri,
+                                           version,
+                                           apikey,
+                                           username=username,
+                                           password=password,
+                                           useragent=useragent,
+                                           transport_controller=transport_controller,
+                                           transport_userdata=transport_userdata,
+                                           pool_maxsize=pool_maxsize,
+                                           keep_alive=keep_alive,
+                                           json_codec=json_codec,
+                                           timeout=timeout)
+
+        self._concurrency = concurrency
+        self._semaphore = None
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=0,
+                                         limit_per_host=self._pool_maxsize,
+                                         force_close=not self._keep_alive)
+        return aiohttp.ClientSession(connector=connector)
+
+    def _get_semaphore(self):
+        # created lazily so it binds to the loop the client is used from
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        return self._semaphore
+
+    @staticmethod
+    def _client_timeout(timeout):
+        """ translate a requests style timeout into an aiohttp.ClientTimeout """
+        if timeout is None:
+            return aiohttp.ClientTimeout(total=None)
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def _request(self, method, uri, params=None, timeout=None, **kwargs):
+        if params:
+            # aiohttp rejects None values which requests silently drops
+            params = dict((k, v) for k, v in params.items() if v is not None)
+
+        timeout = self._timeout if timeout is None else timeout
+
+        session = self._get_session()
+        async with self._get_semaphore():
+            try:
+                async with session.request(method, uri, params=params, timeout=self._client_timeout(timeout), **kwargs) as r:
+                    body = await r.read()
+                    if r.status >= 400:
+                        self._raise_http_error(r, body)
+
+                    return self._codec.loads(body)
+            except asyncio.TimeoutError:
+                # raise what the blocking client raises so error handling is shared
+                raise requests.exceptions.Timeout('%s %s timed out after %s' % (method, uri, timeout))
+
+    def _raise_http_error(self, r, body):
+        """ raise the same requests.HTTPError the blocking client raises so error handling is shared """
+        response = requests.models.Response()
+        response.status_code = r.status
+        response.reason = r.reason
+        response.url = str(r.url)
+        response.headers = requests.structures.CaseInsensitiveDict(r.headers)
+        response._content = body
+        response.raise_for_status()
+
+    async def close(self):
+        """ Close all pooled connections owned by this process """
+        session = self._session
+        self._session = None
+
+        if session is not None and self._session_pid == os.getpid():
+            await session.close()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with the asyncio client")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @transport_func
+    async def get(self, endpoint, params=None, headers=None, timeout=None):
+        headers = self._merge_headers(headers)
+        uri = self._gen_full_endpoint(endpoint)
+
+        logger.debug('GET %s', uri, extra={'params': params})
+        return await self._request('GET', uri, params=params, headers=headers, timeout=timeout)
+
+    @transport_func
+    async def post(self, endpoint, data=None, headers=None, timeout=None):
+        headers = self._merge_headers(headers, is_post=True)
+        uri = self._gen_full_endpoint(endpoint)
+
+        logger.debug('POST %s', uri, extra={'data': data})
+        return await self._request('POST', uri, data=self._encode(data), headers=headers, timeout=timeout)
+
+    @transport_func
+    async def put(self, endpoint, data=None, headers=None, timeout=None):
+        headers = self._merge_headers(headers, is_post=True)
+        uri = self._gen_full_endpoint(endpoint)
+
+        logger.debug('PUT %s', uri, extra={'data': data})
+        return await self._request('PUT', uri, data=self._encode(data), headers=headers, timeout=timeout)
+
+    @transport_func
+    async def delete(self, endpoint, headers=None, timeout=None):
+        headers = self._merge_headers(headers, is_post=True)
+        uri = self._gen_full_endpoint(endpoint)
+
+        logger.debug('DELETE %s', uri)
+        return await self._request('DELETE', uri, headers=headers, timeout=timeout)
+
+
+class AsyncAnonStackInterface(AnonStackInterface):
+    """ AnonStackInterface whose GET, POST and LIST calls are coroutines """
+
+    async def GET(self, id=None, params=None, action=None, headers=None, timeout=None):
+        """
+        Call GET on the endpoint, see AnonStackInterface.GET
+
+        Unlike the blocking interface every page of a list result is fetched before
+        returning, pages numbered in the meta block are fetched concurrently.
+        """
+        endpoint = self._versioned_endpoint(self._endpoint, id, action)
+
+        rest_result = await self._rest_client.get(endpoint, params=params, headers=headers, timeout=timeout)
+        data = self._unwind_result(rest_result)
+        if isinstance(data, list):
+            data.extend(await self._remaining_pages(endpoint, params, headers, rest_result.get('meta') or {}, timeout))
+
+        return self._wrap_rest_data(data)
+
+    async def _remaining_pages(self, endpoint, params, headers, meta, timeout=None):
+        """ the items of every page after the one described by meta """
+        items = []
+        entrypoint = self._rest_client.entrypoint
+        following = next_page(meta, params, endpoint, entrypoint)
+        if following is None:
+            return items
+
+        page = meta.get('page')
+        pages = meta.get('pages', meta.get('total_pages'))
+        if following[1] is not None and page is not None and pages is not None:
+            calls = []
+            for number in range(int(page) + 1, int(pages) + 1):
+                page_params = dict(params or {})
+                page_params['page'] = number
+                calls.append(self._rest_client.get(endpoint, params=page_params, headers=headers, timeout=timeout))
+
+            for result in await asyncio.gather(*calls):
+                items.extend(self._unwind_result(result))
+            return items
+
+        # links have to be followed one page after the other
+        while following is not None:
+            result = await self._rest_client.get(following[0], params=following[1], headers=headers, timeout=timeout)
+            items.extend(self._unwind_result(result))
+            following = next_page(result.get('meta') or {}, following[1], endpoint, entrypoint)
+        return items
+
+    async def POST(self, data=None, headers=None, action=None, timeout=None):
+        """ Call POST on the endpoint, see AnonStackInterface.POST """
+        endpoint = self._versioned_endpoint(self._endpoint, action=action)
+
+        resp = await self._rest_client.post(endpoint, data=data, headers=headers, timeout=timeout)
+
+        return self._unwind_result(resp)
+
+    async def LIST(self, params=None, headers=None, timeout=None):
+        return await self.GET(params=params, headers=headers, timeout=timeout)
+
+
+class AsyncAnonStackObject(AnonStackObject, AsyncAnonStackInterface):
+    """ AnonStackObject whose REST actions are coroutines """
+
+    async def CREATE(self, headers=None, timeout=None):
+        """ create an object record on the server """
+        resource = self.get('resource', None)
+        if resource:
+            raise ValueError('Can not create, this resource already exists.')
+
+        endpoint = self._versioned_endpoint(self._endpoint)
+        resp = await self._rest_client.post(endpoint, data=self, headers=headers, timeout=timeout)
+
+        self._merge_result(self._unwind_result(resp))
+
+        return self
+
+    async def UPDATE(self, headers=None, full=False, timeout=None):
+        """ update an object record on the server, see AnonStackObject.UPDATE """
+        resource = self.get('resource', None)
+        if not resource:
+            raise ValueError('Must have a resource to update.')
+
+        data = self._update_payload(full)
+        if data is None:
+            return self
+
+        resp = await self._rest_client.put(resource, data=data, headers=headers, timeout=timeout)
+
+        self._merge_result(self._unwind_result(resp))
+
+        return self
+
+    async def PUT(self, data=None, action=None, headers=None, timeout=None):
+        endpoint = self._get_endpoint(action)
+        resp = await self._rest_client.put(endpoint, data=data, headers=headers, timeout=timeout)
+
+        return self._unwind_result(resp)
+
+    async def GET(self, params=None, action=None, headers=None, timeout=None):
+        endpoint = self._get_endpoint(action)
+        resp = await self._rest_client.get(endpoint, params=params, headers=headers, timeout=timeout)
+
+        return self._unwind_result(resp)
+
+    async def DELETE(self, headers=None, timeout=None):
+        """ delete the object record on the server """
+        resource = self.get('resource')
+        if resource is None:
+            raise ValueError('Can not delete, this is not a resource from the server.')
+
+        resp = await self._rest_client.delete(resource, headers=headers, timeout=timeout)
+
+        self._merge_result(self._unwind_result(resp))
+
+        return self
+
+
+AsyncAnonStackInterface._interface_class = AsyncAnonStackInterface
+AsyncAnonStackInterface._object_class = AsyncAnonStackObject
+
+
+class AsyncStackApi(StackApi):
+    _interface_class = AsyncAnonStackInterface
+
+    def __init__(self, entrypoint_uri='https://api.stackdriver.com/', version=StackApi.API_VERSION, apikey=None, use_custom_headers=False, transport_controller=None, transport_userdata=None,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, keep_alive=True, concurrency=DEFAULT_CONCURRENCY, json_codec=None, timeout=None):
+        """
+        asyncio entry point for the Stackdriver API
+
+        Attribute chaining works the same as StackApi but every REST action has to be awaited:
+
+            async with AsyncStackApi(apikey='yourapikey') as api:
+                groups = await api.Groups.LIST()
+                resources = await api.Alerting.Maintenance.Resources.GET()
+
+        :param concurrency: maximum number of requests in flight at once, further calls wait
+        :param transport_controller: if set it must be a coroutine function
+        :param timeout: seconds to wait for the API on each call, or a (connect, read) tuple
+
+        See StackApi for the rest of the parameters
+        """
+        if not apikey and not use_custom_headers and not transport_controller:
+            raise KeyError('apikey must be specified when talking to the Stackdriver API')
+
+        self._rest_client = AsyncRestApi(entrypoint_uri,
+                                         version,
+                                         apikey,
+                                         useragent='Stackdriver Python Client %s' % __version__,
+                                         transport_controller=transport_controller,
+                                         transport_userdata=transport_userdata,
+                                         pool_maxsize=pool_maxsize,
+                                         keep_alive=keep_alive,
+                                         concurrency=concurrency,
+                                         json_codec=json_codec,
+                                         timeout=timeout)
+
+    async def close(self):
+        """ Close the pooled connections to the API """
+        await self._rest_client.close()
+
+    async def _fetch_one(self, item, headers=None):
+        if isinstance(item, AnonStackObject):
+            endpoint = item._get_endpoint()
+        else:
+            endpoint = item
+
+        resp = await self._rest_client.get(endpoint, headers=headers)
+        return self._wrap_resource_data(AnonStackInterface._unwind_result(resp))
+
+    async def fetch_many(self, objects_or_resource_paths, concurrency=DEFAULT_CONCURRENCY, headers=None):
+        """ GET many resources concurrently, see StackApi.fetch_many, results are in input order """
+        async def fetch(item):
+            return await self._fetch_one(item, headers=headers)
+
+        return await run_bulk_async(fetch, objects_or_resource_paths, concurrency)
+
+    async def _run_many(self, action, objects, concurrency, headers):
+        async def call(obj):
+            return await getattr(obj, action)(headers=headers)
+
+        return await run_bulk_async(call, objects, concurrency)
+
+    async def create_many(self, objects, concurrency=DEFAULT_CONCURRENCY, headers=None):
+        """ CREATE many objects concurrently, see StackApi.create_many """
+        return await self._run_many('CREATE', objects, concurrency, headers)
+
+    async def update_many(self, objects, concurrency=DEFAULT_CONCURRENCY, headers=None):
+        """ UPDATE many objects concurrently, see StackApi.create_many """
+        return await self._run_many('UPDATE', objects, concurrency, headers)
+
+    async def delete_many(self, objects, concurrency=DEFAULT_CONCURRENCY, headers=None):
+        """ DELETE many objects concurrently, see StackApi.create_many """
+        return await self._run_many('DELETE', objects, concurrency, headers)
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with the asyncio client")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,100 @@
+"""
+bulk - run many API calls concurrently over a shared connection pool
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from .deadline import current_deadline, carry
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 32
+
+
+class BulkResult(namedtuple('BulkResult', 'index item result error')):
+    """
+    The outcome of one item of a bulk call
+
+    index is the position of the item in the input, item is the input itself, result
+    is what the call returned and error is the exception it raised (or None)
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def run_bulk(func, items, concurrency=DEFAULT_CONCURRENCY, stream=False):
+    """
+    Call func on each item using up to concurrency threads
+
+    An exception raised for one item is recorded in its BulkResult and does not stop
+    the other items.  The caller's Deadline applies to every call, items not started
+    when it passes fail with DeadlineExceeded without being called.
+
+    :param func: called with a single item
+    :param items: iterable of items
+    :param concurrency: maximum number of calls in flight at once
+    :param stream: if True return an iterator yielding each BulkResult as soon as it
+        finishes, otherwise return a list of BulkResults in input order
+    """
+    items = list(items)
+    if not items:
+        return iter([]) if stream else []
+
+    deadline = current_deadline()
+
+    def call(indexed):
+        index, item = indexed
+        try:
+            with carry(deadline):
+                if deadline is not None:
+                    deadline.check()
+                return BulkResult(index, item, func(item), None)
+        except Exception as e:
+            logger.debug('bulk call failed for %r: %s', item, e)
+            return BulkResult(index, item, None, e)
+
+    if stream:
+        return _stream_results(call, items, concurrency)
+
+    pool = ThreadPool(min(concurrency, len(items)))
+    try:
+        return pool.map(call, enumerate(items), chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _stream_results(call, items, concurrency):
+    # created on the first next() so a stream that is never iterated starts no threads
+    pool = ThreadPool(min(concurrency, len(items)))
+    try:
+        for result in pool.imap_unordered(call, enumerate(items)):
+            yield result
+    finally:
+        # stops queued items if the caller stopped iterating early
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,188 @@
+"""
+cache - bounded response cache for GET requests
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from collections import OrderedDict
+import re
+import threading
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 60
+
+_version_prefix = re.compile(r'^v[0-9.]+/')
+
+
+def _normalize_path(endpoint):
+    """ turn '/v0.2/groups/67' into 'groups/67/' so endpoints can be compared """
+    path = endpoint.split('?', 1)[0].lstrip('/')
+    path = _version_prefix.sub('', path)
+    if path and not path.endswith('/'):
+        path += '/'
+    return path
+
+
+class _CacheEntry(object):
+    __slots__ = ('path', 'body', 'expires', 'etag', 'last_modified')
+
+    def __init__(self, path, body, expires, etag, last_modified):
+        self.path = path
+        self.body = body
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache(object):
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, endpoint_ttls=None):
+        """
+        LRU cache of GET responses keyed on endpoint, query params and apikey
+
+        Entries are kept for ttl seconds.  Once expired, an entry that came with an ETag or
+        Last-Modified header is revalidated with If-None-Match/If-Modified-Since instead of
+        being downloaded again.  POST, PUT and DELETE calls invalidate the entries for the
+        resource they touch as well as its parent collection.
+
+        The raw response body is cached and decoded again on every hit so callers never
+        share mutable results.
+
+        :param max_entries: maximum number of responses kept, least recently used are evicted first
+        :param ttl: default number of seconds a response is fresh for
+        :param endpoint_ttls: dict of endpoint prefix to ttl overriding the default, for
+            example {'users/': 300, 'alerting/': 0}.  Prefixes do not include the api version
+            and a ttl of 0 disables caching for that endpoint.
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl
+
+        # longest prefixes first so the most specific match wins
+        self._endpoint_ttls = sorted(((_normalize_path(prefix), prefix_ttl) for prefix, prefix_ttl in (endpoint_ttls or {}).items()),
+                                     key=lambda item: len(item[0]), reverse=True)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, endpoint):
+        path = _normalize_path(endpoint)
+        for prefix, prefix_ttl in self._endpoint_ttls:
+            if path.startswith(prefix):
+                return prefix_ttl
+
+        return self._ttl
+
+    def lookup(self, key):
+        """
+        Return (body, validators) for key
+
+        body is the cached body if the entry is still fresh, otherwise None.  validators is
+        a dict of conditional request headers to send when the entry is stale but can be
+        revalidated, otherwise None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            # reinsert to mark the entry as most recently used
+            self._entries[key] = entry
+
+            if entry.expires > time.time():
+                self.hits += 1
+                return entry.body, None
+
+            validators = {}
+            if entry.etag:
+                validators['if-none-match'] = entry.etag
+            if entry.last_modified:
+                validators['if-modified-since'] = entry.last_modified
+
+            if not validators:
+                del self._entries[key]
+
+            self.misses += 1
+            return None, validators or None
+
+    def revalidated(self, key, endpoint):
+        """ The server answered 304 Not Modified, return the cached body and make it fresh again """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            entry.expires = time.time() + self.ttl_for(endpoint)
+            self.revalidations += 1
+            return entry.body
+
+    def store(self, key, endpoint, body, etag=None, last_modified=None):
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+
+        entry = _CacheEntry(_normalize_path(endpoint), body, time.time() + ttl, etag, last_modified)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, endpoint):
+        """ Drop every entry for endpoint and anything below it as well as its parent collection """
+        path = _normalize_path(endpoint)
+        parent = path.rstrip('/').rpartition('/')[0]
+        parent = parent + '/' if parent else None
+
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry.path.startswith(path) or entry.path == parent]
+            for key in stale:
+                del self._entries[key]
+
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,191 @@
+"""
+circuit - fail fast while the API is degraded
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import time
+
+import requests
+
+import logging
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+FAILURE_STATUSES = frozenset([500, 502, 503, 504])
+
+
+class CircuitOpenError(requests.RequestException):
+    """ Raised instead of calling the API while the circuit is open """
+
+
+class CircuitBreaker(object):
+    def __init__(self, failure_threshold=5, recovery_timeout=30, half_open_calls=1, failure_statuses=FAILURE_STATUSES):
+        """
+        Stops calling the API after repeated failures and tries again after a while
+
+        The circuit starts closed.  After failure_threshold consecutive failed calls
+        (connection errors, timeouts and failure_statuses) it opens and every call raises
+        CircuitOpenError without touching the network.  After recovery_timeout seconds it
+        is half open: half_open_calls trial calls go through, if they succeed the circuit
+        closes again, if one fails it opens for another recovery_timeout.
+
+        Watch state and stats() to tune the thresholds, or subscribe to state changes:
+
+            breaker.on_state_change(lambda old, new: logger.warning('circuit %s -> %s', old, new))
+
+        :param failure_threshold: consecutive failures opening the circuit
+        :param recovery_timeout: seconds the circuit stays open before a trial call
+        :param half_open_calls: trial calls allowed at once while half open
+        :param failure_statuses: HTTP statuses counted as failures
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self.failure_statuses = frozenset(failure_statuses)
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trials = 0
+        self._listeners = []
+        # state changes made under the lock, listeners are called once it is released
+        self._changes = []
+        self._lock = threading.Lock()
+
+        self.opened = 0
+        self.rejected = 0
+        self.total_failures = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            state = self._current_state(time.time())
+        self._notify()
+        return state
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._set_state(HALF_OPEN)
+            self._trials = 0
+        return self._state
+
+    def _set_state(self, state):
+        """ the lock must be held """
+        if state != self._state:
+            self._changes.append((self._state, state))
+            self._state = state
+
+    def _notify(self):
+        with self._lock:
+            if not self._changes:
+                return
+            changes = self._changes
+            self._changes = []
+
+        for old, new in changes:
+            logger.info('Circuit breaker %s -> %s', old, new)
+            for listener in list(self._listeners):
+                try:
+                    listener(old, new)
+                except Exception:
+                    logger.exception('Circuit breaker listener failed')
+
+    def on_state_change(self, callback):
+        """ call callback(old_state, new_state) whenever the state changes """
+        self._listeners.append(callback)
+
+    def before_call(self):
+        """ raise CircuitOpenError if a call may not be made now """
+        try:
+            with self._lock:
+                state = self._current_state(time.time())
+                if state == CLOSED:
+                    return
+
+                if state == HALF_OPEN and self._trials < self.half_open_calls:
+                    self._trials += 1
+                    return
+
+                self.rejected += 1
+                retry_in = max(0, self._opened_at + self.recovery_timeout - time.time())
+        finally:
+            self._notify()
+
+        raise CircuitOpenError('Circuit open after repeated failures, not calling the API for another %.1fs' % retry_in)
+
+    def is_failure(self, response=None, error=None):
+        if error is not None:
+            return isinstance(error, (requests.ConnectionError, requests.Timeout))
+        return response is not None and response.status_code in self.failure_statuses
+
+    def record(self, response=None, error=None):
+        """ report the outcome of a call allowed by before_call """
+        failed = self.is_failure(response, error)
+        if error is not None and not failed:
+            # says nothing about the API's health
+            self.release()
+            return
+
+        try:
+            with self._lock:
+                state = self._current_state(time.time())
+                if not failed:
+                    self._failures = 0
+                    if state == HALF_OPEN:
+                        self._set_state(CLOSED)
+                    return
+
+                self._failures += 1
+                self.total_failures += 1
+                if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                    self._set_state(OPEN)
+                    self._opened_at = time.time()
+                    self.opened += 1
+        finally:
+            self._notify()
+
+    def release(self):
+        """ a call allowed by before_call ended without an outcome worth recording, give its trial back """
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials:
+                self._trials -= 1
+
+    def reset(self):
+        with self._lock:
+            self._set_state(CLOSED)
+            self._failures = 0
+        self._notify()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'state': self._current_state(time.time()),
+                'consecutive_failures': self._failures,
+                'failures': self.total_failures,
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
+        self._notify()
+        return stats
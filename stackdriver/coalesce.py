@@ -0,0 +1,121 @@
+"""
+coalesce - share one in-flight call between identical concurrent callers
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+
+from .deadline import current_deadline, DeadlineExceeded
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error', 'waiters', 'copies')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.copies = None
+
+
+class SingleFlight(object):
+    def __init__(self):
+        """
+        Runs at most one call per key at a time
+
+        The first caller for a key makes the call, callers arriving with the same key while it
+        is in flight wait for it and receive its result or its exception.  A waiting caller
+        only waits as long as its own Deadline allows, and if the call failed because the
+        first caller ran out of time it is made again for the callers who still have time.
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, func, copy=None):
+        """
+        Call func unless a call for key is already in flight
+
+        :param copy: if set, called on the result to give each waiting caller its own copy,
+            the copies are made before the result is returned to anyone so no caller sees
+            another's changes
+        :return: (result, shared) where shared is True if the result came from another
+            caller's call, without copy the caller should copy it before changing it
+        """
+        deadline = current_deadline()
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = _Call()
+                    self._calls[key] = call
+                    self.calls += 1
+                    break
+
+                self.coalesced += 1
+                call.waiters += 1
+
+            if not call.done.wait(deadline.remaining() if deadline is not None else None):
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        call.waiters -= 1
+                raise DeadlineExceeded('Deadline exceeded waiting for a shared call')
+
+            if isinstance(call.error, DeadlineExceeded) and (deadline is None or not deadline.expired):
+                # the caller who made the call ran out of time, we may not have
+                continue
+            if call.error is not None:
+                raise call.error
+            if call.copies is not None:
+                with self._lock:
+                    return call.copies.pop(), True
+            return call.result, True
+
+        # if the call is interrupted by something other than an Exception the waiters get this
+        call.error = RuntimeError('The shared call was interrupted')
+        try:
+            call.result = func()
+            call.error = None
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+
+            if copy is not None and waiters and call.error is None:
+                try:
+                    call.copies = [copy(call.result) for _ in range(waiters)]
+                except Exception as e:
+                    call.error = e
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced}
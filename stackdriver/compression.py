@@ -0,0 +1,131 @@
+"""
+compression - request body compression and response compression metrics
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import time
+import zlib
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+
+# zlib window bits producing a gzip or a zlib (http deflate) stream
+_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+
+class Compression(object):
+    def __init__(self, encoding='gzip', min_size=DEFAULT_MIN_SIZE, level=DEFAULT_LEVEL):
+        """
+        Compress request bodies and keep count of the bytes saved in both directions
+
+        Bodies of at least min_size bytes are compressed and sent with a Content-Encoding
+        header, smaller ones are not worth the CPU.  Responses are always negotiated with
+        Accept-Encoding and decompressed transparently, their size on the wire is compared
+        to the decoded size.
+
+        :param encoding: 'gzip' or 'deflate'
+        :param min_size: smallest request body, in bytes, to compress
+        :param level: zlib compression level from 1 (fastest) to 9 (smallest)
+        """
+        if encoding not in _WBITS:
+            raise ValueError('Unsupported encoding %r, expected gzip or deflate' % encoding)
+
+        self.encoding = encoding
+        self.min_size = min_size
+        self.level = level
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def compress(self, body):
+        """ Return (body, encoding), encoding is None if the body was left as is """
+        if body is None:
+            return body, None
+
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+
+        if len(body) < self.min_size:
+            return body, None
+
+        start = time.time()
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS[self.encoding])
+        compressed = compressor.compress(body) + compressor.flush()
+        elapsed = time.time() - start
+
+        with self._lock:
+            self.requests_compressed += 1
+            self.request_bytes += len(body)
+            self.request_wire_bytes += len(compressed)
+            self.compress_seconds += elapsed
+
+        return compressed, self.encoding
+
+    def record_response(self, r):
+        """ Count a fully read requests response, its raw stream knows how many bytes came over the wire """
+        content_encoding = r.headers.get('content-encoding')
+        try:
+            wire_bytes = r.raw.tell()
+        except Exception:
+            wire_bytes = None
+        if not wire_bytes:
+            wire_bytes = len(r.content)
+
+        with self._lock:
+            self.responses += 1
+            if content_encoding and content_encoding != 'identity':
+                self.responses_compressed += 1
+            self.response_bytes += len(r.content)
+            self.response_wire_bytes += wire_bytes
+
+    def reset(self):
+        with self._lock:
+            self.requests_compressed = 0
+            self.request_bytes = 0
+            self.request_wire_bytes = 0
+            self.compress_seconds = 0.0
+            self.responses = 0
+            self.responses_compressed = 0
+            self.response_bytes = 0
+            self.response_wire_bytes = 0
+
+    def stats(self):
+        """ byte counts before and after compression, ratio is compressed / uncompressed """
+        with self._lock:
+            return {
+                'requests_compressed': self.requests_compressed,
+                'request_bytes': self.request_bytes,
+                'request_wire_bytes': self.request_wire_bytes,
+                'request_ratio': float(self.request_wire_bytes) / self.request_bytes if self.request_bytes else None,
+                'compress_seconds': self.compress_seconds,
+                'responses': self.responses,
+                'responses_compressed': self.responses_compressed,
+                'response_bytes': self.response_bytes,
+                'response_wire_bytes': self.response_wire_bytes,
+                'response_ratio': float(self.response_wire_bytes) / self.response_bytes if self.response_bytes else None,
+            }
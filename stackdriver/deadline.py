@@ -0,0 +1,129 @@
+"""
+deadline - a time budget shared by every call of an operation
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import time
+
+import requests
+
+import logging
+logger = logging.getLogger(__name__)
+
+# shortest timeout handed to a call, requests does not accept 0
+MIN_TIMEOUT = 0.001
+
+_local = threading.local()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """ Raised when a call can not be made or finished before the deadline """
+
+
+def current_deadline():
+    """ the deadline in effect on this thread, or None """
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+class Deadline(object):
+    def __init__(self, seconds):
+        """
+        A time budget for everything done inside a with block
+
+            with Deadline(2.0):
+                group = api.Groups.GET(id=67)
+                api.fetch_many(group.GET(action='members'))
+
+        Every call made on this thread while the block runs gets the remaining budget as
+        its timeout (or its own timeout if that is shorter).  Retries, rate limiting and key
+        pool waits never go past the deadline, and once it passed calls raise
+        DeadlineExceeded instead of reaching the network.  Bulk calls and page prefetching
+        carry the deadline over to their worker threads and drop the items not yet started.
+
+        Nested deadlines can only shorten the budget.  Requests time out on each connect
+        and read rather than on the whole response, so a server trickling a large body can
+        still overrun by up to the remaining budget.
+
+        :param seconds: the budget from now
+        """
+        self.expires = time.time() + seconds
+        self._cancelled = False
+
+    def __repr__(self):
+        return 'Deadline(remaining=%.3f)' % self.remaining()
+
+    def remaining(self):
+        """ seconds left, 0 once expired or cancelled """
+        if self._cancelled:
+            return 0
+        return max(0, self.expires - time.time())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def cancel(self):
+        """ expire now, calls still to be made under this deadline raise DeadlineExceeded """
+        self._cancelled = True
+
+    def check(self):
+        if self.expired:
+            raise DeadlineExceeded('Deadline exceeded' if not self._cancelled else 'Deadline cancelled')
+
+    def timeout(self, timeout=None):
+        """ the timeout to give a call, the remaining budget or timeout if that is shorter """
+        remaining = max(MIN_TIMEOUT, self.remaining())
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+
+        # a nested deadline can not extend the one around it
+        if stack and stack[-1].expires <= self.expires:
+            stack.append(stack[-1])
+        else:
+            stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.stack.pop()
+
+
+class _NoDeadline(object):
+    """ stands in for a deadline when there is none to carry over """
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def carry(deadline):
+    """ a context manager installing deadline on a worker thread, or doing nothing if it is None """
+    return deadline if deadline is not None else _NoDeadline()
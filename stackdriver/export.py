@@ -0,0 +1,215 @@
+"""
+export - dump a collection to NDJSON or CSV from the command line
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+Installed as the stackdriver-export command:
+
+    stackdriver-export Groups > groups.ndjson
+    stackdriver-export Alerting.Maintenance.Resources --format csv --output maintenance.csv
+    stackdriver-export Instances --parallel 8 --param per_page=1000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from multiprocessing.pool import ThreadPool
+
+from .stackapi import StackApi
+from .resultset import ResultSet
+
+import logging
+logger = logging.getLogger(__name__)
+
+FORMATS = ('ndjson', 'csv')
+
+
+def resolve_interface(api, path):
+    """ 'Alerting.Maintenance.Resources' -> api.Alerting.Maintenance.Resources """
+    interface = api
+    for name in path.split('.'):
+        if not name or not name[0].isupper():
+            raise ValueError('Invalid endpoint path %r, expected names like Alerting.Maintenance.Resources' % path)
+        interface = getattr(interface, name)
+    return interface
+
+
+def open_output(path):
+    """ open path for writing, the csv module adds its own line endings and needs them left alone """
+    if sys.version_info[0] < 3:
+        return open(path, 'wb')
+    return io.open(path, 'w', newline='')
+
+
+class NDJSONWriter(object):
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, item):
+        self._f.write(json.dumps(item, separators=(',', ':')) + '\n')
+
+
+class CSVWriter(object):
+    def __init__(self, f, fields=None):
+        """
+        Writes one row per item, the columns are fields or the keys of the first item
+
+        Keys missing from the columns are dropped, nested lists and dicts are written as JSON.
+        """
+        self._f = f
+        self._fields = fields
+        self._writer = None
+
+    def write(self, item):
+        if self._writer is None:
+            fields = self._fields or sorted(item)
+            self._writer = csv.DictWriter(self._f, fields, extrasaction='ignore')
+            self._writer.writeheader()
+
+        self._writer.writerow(dict((key, json.dumps(value) if isinstance(value, (dict, list)) else value)
+                                   for key, value in item.items()))
+
+
+def iter_items(interface, params=None):
+    """ every item of the collection, pages are streamed so only one item is decoded at a time """
+    result = interface.LIST(params=params, stream=True)
+    if not isinstance(result, ResultSet):
+        raise TypeError('%s did not return a list' % interface._endpoint)
+
+    for data in result.pages():
+        for item in data:
+            yield item
+
+
+def iter_items_parallel(interface, params=None, parallel=4):
+    """
+    every item of the collection, fetching up to parallel pages at once
+
+    Pages are fetched in windows of parallel pages and written in order, so at most that
+    many pages are held in memory.  Only collections paginated by page number can be
+    fetched in parallel, others are read one page after the other.
+    """
+    endpoint = interface._versioned_endpoint(interface._endpoint)
+    first = interface.LIST(params=params)
+    if not isinstance(first, ResultSet):
+        raise TypeError('%s did not return a list' % interface._endpoint)
+
+    meta = first.meta
+    page = meta.get('page')
+    pages = meta.get('pages', meta.get('total_pages'))
+    if page is None or pages is None:
+        logger.warning('%s is not paginated by page number, fetching pages one at a time', endpoint)
+        for data in first.pages():
+            for item in data:
+                yield item
+        return
+
+    for data in first.pages():
+        for item in data:
+            yield item
+        break
+
+    def fetch(number):
+        page_params = dict(params or {})
+        page_params['page'] = number
+        result = interface._rest_client.get(endpoint, params=page_params)
+        return interface._unwind_result(result)
+
+    remaining = list(range(int(page) + 1, int(pages) + 1))
+    pool = ThreadPool(parallel)
+    try:
+        for start in range(0, len(remaining), parallel):
+            for data in pool.map(fetch, remaining[start:start + parallel]):
+                for item in data:
+                    yield item
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def parse_params(values):
+    params = {}
+    for value in values or []:
+        key, sep, param = value.partition('=')
+        if not sep:
+            raise ValueError('Invalid --param %r, expected key=value' % value)
+        params[key] = param
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='stackdriver-export',
+                                     description='Dump a Stackdriver API collection to NDJSON or CSV')
+    parser.add_argument('path', help='the collection in StackApi attribute syntax, e.g. Groups or Alerting.Maintenance.Resources')
+    parser.add_argument('--apikey', default=os.environ.get('STACKDRIVER_API_KEY'),
+                        help='API key, defaults to the STACKDRIVER_API_KEY environment variable')
+    parser.add_argument('--entrypoint', default='https://api.stackdriver.com/', help='API url')
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--fields', help='comma separated CSV columns, defaults to the keys of the first item')
+    parser.add_argument('--output', help='file to write to instead of stdout')
+    parser.add_argument('--param', action='append', metavar='KEY=VALUE', help='list parameter, may be repeated')
+    parser.add_argument('--parallel', type=int, default=1, help='number of pages fetched at once')
+    parser.add_argument('--timeout', type=float, help='seconds to wait for each call')
+    args = parser.parse_args(argv)
+
+    if not args.apikey:
+        parser.error('an API key is required, use --apikey or set STACKDRIVER_API_KEY')
+
+    try:
+        params = parse_params(args.param)
+    except ValueError as e:
+        parser.error(str(e))
+
+    api = StackApi(args.entrypoint, apikey=args.apikey, timeout=args.timeout, pool_maxsize=max(args.parallel, 1))
+    try:
+        interface = resolve_interface(api, args.path)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open_output(args.output) if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            writer = CSVWriter(out, args.fields.split(',') if args.fields else None)
+        else:
+            writer = NDJSONWriter(out)
+
+        if args.parallel > 1:
+            items = iter_items_parallel(interface, params, args.parallel)
+        else:
+            items = iter_items(interface, params)
+
+        count = 0
+        for item in items:
+            writer.write(item)
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        api.close()
+
+    logger.info('Exported %d items from %s', count, args.path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
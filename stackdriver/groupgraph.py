@@ -0,0 +1,263 @@
+"""
+groupgraph - in-memory graph of the group hierarchy
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from collections import deque
+import threading
+
+from .bulk import run_bulk
+from .resultset import ResultSet
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+
+
+class GroupGraph(object):
+    def __init__(self, api, concurrency=DEFAULT_CONCURRENCY, members_action='members'):
+        """
+        The group hierarchy, crawled once and then queried locally
+
+            graph = GroupGraph(api)
+            graph.crawl()
+            for group in graph.descendants(graph.by_name('Production')[0].id):
+                print group.name, len(graph.members(group.id))
+
+        crawl() lists every group, then fetches any parent missing from the list and the
+        members of each group with at most concurrency calls in flight.  Every group is
+        fetched at most once per crawl.  Groups are indexed by id, name and parent_id so
+        parent, children, ancestor and descendant queries never call the API.
+
+        refresh() brings the graph up to date without starting over, only members of groups
+        which changed are fetched again.
+
+        :param api: the StackApi to crawl with
+        :param concurrency: maximum number of calls in flight at once
+        :param members_action: the group action listing its members, None to skip members
+        """
+        self._api = api
+        self._concurrency = concurrency
+        self._members_action = members_action
+
+        self._groups = {}
+        # plain copies of the groups as indexed, an identity map updates the objects in place
+        self._versions = {}
+        self._by_name = {}
+        self._children = {}
+        self._members = {}
+        # ids of parents fetched because the listing did not include them
+        self._unlisted = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __contains__(self, id):
+        return id in self._groups
+
+    def __iter__(self):
+        return iter(list(self._groups.values()))
+
+    def crawl(self):
+        """ Build the graph from scratch, returns self """
+        groups = self._list_groups()
+        with self._lock:
+            self._groups = {}
+            self._versions = {}
+            self._by_name = {}
+            self._children = {}
+            self._members = {}
+            self._unlisted = set()
+            self._add(groups)
+
+        self._fetch_missing_parents()
+        self._fetch_members(list(self._groups))
+        return self
+
+    def refresh(self, ids=None):
+        """
+        Update the graph and return the set of ids of the groups which changed
+
+        With no ids every group is listed again, groups which disappeared are removed and
+        members are fetched again for the groups which were added or changed.  With ids
+        only those groups and their members are fetched again.
+        """
+        if ids is None:
+            groups = self._list_groups()
+            seen = set(group['id'] for group in groups)
+            with self._lock:
+                self._unlisted -= seen
+                removed = set(self._groups) - seen - self._referenced_unlisted(groups)
+                changed = set(group['id'] for group in groups if self._versions.get(group['id']) != dict(group))
+                self._remove(removed)
+                self._add(group for group in groups if group['id'] in changed)
+        else:
+            ids = set(ids)
+            removed = set()
+            groups = []
+            for result in run_bulk(self._get_group, ids, concurrency=self._concurrency):
+                if result.ok:
+                    groups.append(result.result)
+                elif getattr(getattr(result.error, 'response', None), 'status_code', None) == 404:
+                    removed.add(result.item)
+                else:
+                    raise result.error
+
+            with self._lock:
+                self._remove(removed)
+                self._add(groups)
+            changed = set(group['id'] for group in groups)
+
+        self._fetch_missing_parents()
+        self._fetch_members(changed)
+        return changed | removed
+
+    def _referenced_unlisted(self, groups):
+        """ the unlisted parents still above one of groups, the lock must be held """
+        kept = set()
+        pending = set(group.get('parent_id') for group in groups) & self._unlisted
+        while pending:
+            id = pending.pop()
+            kept.add(id)
+            parent_id = self._groups[id].get('parent_id')
+            if parent_id in self._unlisted and parent_id not in kept:
+                pending.add(parent_id)
+        return kept
+
+    def _list_groups(self):
+        result = self._api.Groups.LIST()
+        if isinstance(result, ResultSet):
+            return list(result)
+        return list(result or [])
+
+    def _get_group(self, id):
+        return self._api.Groups.GET(id=id)
+
+    def _add(self, groups):
+        """ index groups, replacing older versions of them, the lock must be held """
+        for group in groups:
+            id = group['id']
+            old = self._versions.get(id)
+            if old is not None:
+                self._unindex(old)
+
+            self._groups[id] = group
+            self._versions[id] = dict(group)
+            self._by_name.setdefault(group.get('name'), set()).add(id)
+            self._children.setdefault(group.get('parent_id'), set()).add(id)
+
+    def _remove(self, ids):
+        for id in ids:
+            self._groups.pop(id, None)
+            group = self._versions.pop(id, None)
+            if group is not None:
+                self._unindex(group)
+            self._members.pop(id, None)
+            self._unlisted.discard(id)
+
+    def _unindex(self, group):
+        for index, key in ((self._by_name, group.get('name')), (self._children, group.get('parent_id'))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(group['id'])
+                if not ids:
+                    del index[key]
+
+    def _fetch_missing_parents(self):
+        """ fetch parents which were not in the listing, level by level, each at most once """
+        tried = set()
+        while True:
+            with self._lock:
+                missing = set(group.get('parent_id') for group in self._groups.values()) - set(self._groups) - tried
+            missing.discard(None)
+            if not missing:
+                return
+
+            tried |= missing
+            groups = [result.result for result in run_bulk(self._get_group, missing, concurrency=self._concurrency)
+                      if result.ok]
+            with self._lock:
+                self._add(groups)
+                self._unlisted.update(group['id'] for group in groups)
+
+    def _fetch_members(self, ids):
+        if self._members_action is None or not ids:
+            return
+
+        def fetch(id):
+            result = self._groups[id].GET(action=self._members_action)
+            return list(result) if isinstance(result, ResultSet) else result
+
+        for result in run_bulk(fetch, ids, concurrency=self._concurrency):
+            if result.ok:
+                self._members[result.item] = result.result
+            else:
+                logger.warning('Could not fetch the members of group %s: %s', result.item, result.error)
+
+    def get(self, id):
+        return self._groups.get(id)
+
+    def by_name(self, name):
+        """ every group called name, names are not unique """
+        return [self._groups[id] for id in self._by_name.get(name, ())]
+
+    def parent(self, id):
+        group = self._groups.get(id)
+        if group is None:
+            return None
+        return self._groups.get(group.get('parent_id'))
+
+    def children(self, id):
+        return [self._groups[child] for child in self._children.get(id, ())]
+
+    def roots(self):
+        """ groups without a parent, or whose parent is unknown """
+        return [group for group in self._groups.values() if group.get('parent_id') not in self._groups]
+
+    def ancestors(self, id):
+        """ the parent of the group, its parent and so on up to the root """
+        result = []
+        seen = set([id])
+        group = self.parent(id)
+        while group is not None and group['id'] not in seen:
+            result.append(group)
+            seen.add(group['id'])
+            group = self.parent(group['id'])
+        return result
+
+    def descendants(self, id):
+        """ every group below id, breadth first """
+        result = []
+        seen = set([id])
+        queue = deque([id])
+        while queue:
+            for child in self._children.get(queue.popleft(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    result.append(self._groups[child])
+                    queue.append(child)
+        return result
+
+    def members(self, id):
+        """ the members fetched for the group, None if they were not fetched """
+        return self._members.get(id)
@@ -0,0 +1,194 @@
+"""
+hedge - duplicate slow GETs and take whichever answer comes first
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from collections import deque
+import os
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILE = 0.95
+DEFAULT_INITIAL_DELAY = 0.5
+DEFAULT_WINDOW = 1000
+# latencies needed before the percentile is trusted over initial_delay
+MIN_SAMPLES = 20
+# threads kept around to make the calls, shared by every call using the policy
+DEFAULT_MAX_WORKERS = 32
+
+
+class HedgePolicy(object):
+    def __init__(self, percentile=DEFAULT_PERCENTILE, initial_delay=DEFAULT_INITIAL_DELAY, min_delay=0.01, window=DEFAULT_WINDOW,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Sends a second copy of a GET that is slower than most and uses the first answer
+
+        The delay before the copy is sent is the given percentile of the latencies of the
+        last window GETs, so with the default only the slowest 5% of calls are duplicated
+        and the extra load stays around 5%.  Until enough calls were made initial_delay is
+        used.  Only GETs are hedged, they are safe to send twice.
+
+        Calls are made on worker threads the policy keeps for reuse, a new one is only
+        started when none is idle, so the common case costs no thread creation.
+
+        :param percentile: fraction of calls expected to finish before a copy is sent
+        :param initial_delay: delay used until there are enough latency samples
+        :param min_delay: shortest delay, so fast endpoints are not always duplicated
+        :param window: number of recent latencies the percentile is computed over
+        :param max_workers: most worker threads kept, once all are busy calls wait for one
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        self.max_workers = max_workers
+        self._tasks = queue.Queue()
+        self._workers = 0
+        self._idle = 0
+        self._pid = os.getpid()
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_won = 0
+
+    def delay(self):
+        """ seconds to wait for the first answer before sending a copy """
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return self.initial_delay
+            samples = sorted(self._latencies)
+
+        index = min(len(samples) - 1, int(self.percentile * len(samples)))
+        return max(self.min_delay, samples[index])
+
+    def record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def call(self, func):
+        """
+        Call func, and call it again if it has not returned after delay(), returning the
+        first result.  If the first call to finish raised, the other one's outcome is used.
+
+        :param func: makes the request and returns a response, it runs on worker threads
+        """
+        delay = self.delay()
+        results = queue.Queue()
+        state = {'done': False}
+        lock = threading.Lock()
+
+        def run(hedge):
+            start = time.time()
+            try:
+                outcome = (func(), None)
+            except Exception as e:
+                outcome = (None, e)
+
+            with lock:
+                if state['done']:
+                    # the other copy already answered, release this connection
+                    if outcome[0] is not None:
+                        outcome[0].close()
+                    return
+                if outcome[1] is None:
+                    state['done'] = True
+
+            results.put((hedge, time.time() - start, outcome))
+
+        start = time.time()
+        self._start(run, False)
+        with self._lock:
+            self.calls += 1
+
+        pending = 1
+        try:
+            hedge, latency, outcome = results.get(timeout=delay)
+        except queue.Empty:
+            self._start(run, True)
+            pending += 1
+            with self._lock:
+                self.hedged += 1
+            hedge, latency, outcome = results.get()
+
+        pending -= 1
+        while outcome[1] is not None and pending:
+            # the first to finish failed, wait for the other copy
+            hedge, latency, outcome = results.get()
+            pending -= 1
+
+        if outcome[1] is not None:
+            # failures, such as timeouts on a caller's deadline, would skew the delay
+            raise outcome[1]
+
+        self.record(time.time() - start)
+        if hedge:
+            with self._lock:
+                self.hedge_won += 1
+
+        return outcome[0]
+
+    def _start(self, run, hedge):
+        """ run on a worker thread, starting one only if none is idle """
+        with self._lock:
+            if self._pid != os.getpid():
+                # the workers stayed behind in the parent process
+                self._pid = os.getpid()
+                self._tasks = queue.Queue()
+                self._workers = self._idle = 0
+
+            if self._idle <= self._tasks.qsize() and self._workers < self.max_workers:
+                self._workers += 1
+                self._idle += 1
+                thread = threading.Thread(target=self._work, args=(self._tasks,))
+                thread.daemon = True
+                thread.start()
+
+            self._tasks.put((run, hedge))
+
+    def _work(self, tasks):
+        while True:
+            run, hedge = tasks.get()
+            with self._lock:
+                self._idle -= 1
+
+            # run reports its own outcome and never raises
+            run(hedge)
+
+            with self._lock:
+                self._idle += 1
+
+    def stats(self):
+        with self._lock:
+            calls = self.calls
+            stats = {'calls': calls, 'hedged': self.hedged, 'hedge_won': self.hedge_won}
+        stats['delay'] = self.delay()
+        return stats
@@ -0,0 +1,81 @@
+"""
+identity - one object per server resource
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import weakref
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def _normalize_resource(resource):
+    return resource.strip().rstrip('/') + '/'
+
+
+class IdentityMap(object):
+    def __init__(self):
+        """
+        Maps resource paths to the wrapped object currently representing them
+
+        Objects are weakly referenced so the map never keeps an object alive by itself.
+        When the same resource is wrapped again while its object is alive, the new data is
+        merged into the existing object which is returned instead of a new one.  Changes made
+        to the object and not saved yet are kept on top of the new data.
+        """
+        self._objects = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, resource):
+        return _normalize_resource(resource) in self._objects
+
+    def get(self, resource):
+        return self._objects.get(_normalize_resource(resource))
+
+    def add(self, obj):
+        """ Register an object which got its resource after being created, e.g. by CREATE """
+        with self._lock:
+            self._objects[_normalize_resource(obj['resource'])] = obj
+
+    def wrap(self, data, factory):
+        """
+        Return the live object for data['resource'] updated with data, or factory(data)
+
+        :param factory: creates the wrapped object when there is no live one
+        """
+        key = _normalize_resource(data['resource'])
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None:
+                obj = factory(data)
+                self._objects[key] = obj
+                return obj
+
+        obj._refresh(data, keep_changes=True)
+        return obj
+
+    def discard(self, resource):
+        with self._lock:
+            self._objects.pop(_normalize_resource(resource), None)
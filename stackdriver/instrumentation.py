@@ -0,0 +1,202 @@
+"""
+instrumentation - request events and per endpoint metrics
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import re
+import threading
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+import logging
+logger = logging.getLogger(__name__)
+
+# sent before each network attempt: method, uri, attempt, request_bytes
+REQUEST_START = 'request_start'
+# sent when the response headers arrive: method, uri, attempt, status, ttfb, elapsed
+RESPONSE_RECEIVED = 'response_received'
+# sent once a body has been decoded: method, uri, response_bytes, decode_seconds
+DECODED = 'decoded'
+# sent before sleeping to retry: method, uri, attempt, delay, reason
+RETRIED = 'retried'
+# sent when an attempt fails with an exception or an error status: method, uri, attempt, status, error
+ERROR = 'error'
+
+EVENTS = (REQUEST_START, RESPONSE_RECEIVED, DECODED, RETRIED, ERROR)
+
+# upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float('inf'))
+
+_id_segment = re.compile(r'/[0-9]+(?=/|$)')
+
+
+def endpoint_name(method, uri):
+    """ 'GET', 'https://api.stackdriver.com/v0.2/groups/67/' -> 'GET /v0.2/groups/{id}/' """
+    path = urlsplit(uri).path
+    return '%s %s' % (method, _id_segment.sub('/{id}', path))
+
+
+class Histogram(object):
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        """ Fixed bucket histogram, cheap to update and to merge across processes """
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total += value
+
+    def percentile(self, fraction):
+        """ the upper bound of the bucket holding the given fraction of the samples """
+        if not self.count:
+            return None
+
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= wanted:
+                return bound
+        return self.bounds[-1]
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets': dict(('le_%s' % bound, count) for bound, count in zip(self.bounds, self.counts) if count),
+        }
+
+
+class _EndpointStats(object):
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.decode_seconds = 0.0
+        self.latency_ms = Histogram()
+        self.ttfb_ms = Histogram()
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'decode_seconds': self.decode_seconds,
+            'latency_ms': self.latency_ms.as_dict(),
+            'ttfb_ms': self.ttfb_ms.as_dict(),
+        }
+
+
+class Instrumentation(object):
+    def __init__(self, collect_metrics=True):
+        """
+        Hooks called around every network call a client makes, plus built in metrics
+
+        Subscribe callbacks to the events defined in this module, each is called with the
+        event name and a dict describing it:
+
+            def log_slow(event, info):
+                if info['elapsed'] > 1:
+                    print 'slow call', info['method'], info['uri']
+
+            instrumentation = Instrumentation()
+            instrumentation.subscribe(RESPONSE_RECEIVED, log_slow)
+            api = StackApi(apikey='yourapikey', instrumentation=instrumentation)
+
+        With collect_metrics, request counts, errors, retries, byte counts, decode time and
+        latency/time to first byte histograms are kept per endpoint (ids in the path are
+        replaced by {id}) and returned by stats().
+
+        Callbacks run on the calling thread, exceptions they raise are logged and ignored.
+        DNS and connect time are not reported separately, they are part of ttfb and elapsed.
+        """
+        self._subscribers = dict((event, []) for event in EVENTS)
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+        if collect_metrics:
+            for event in EVENTS:
+                self.subscribe(event, self._record)
+
+    def subscribe(self, event, callback):
+        if event not in self._subscribers:
+            raise ValueError('Unknown event %r, expected one of %s' % (event, ', '.join(EVENTS)))
+
+        with self._lock:
+            # copy so emit can iterate without holding the lock
+            self._subscribers[event] = self._subscribers[event] + [callback]
+
+    def unsubscribe(self, event, callback):
+        with self._lock:
+            self._subscribers[event] = [cb for cb in self._subscribers[event] if cb != callback]
+
+    def emit(self, event, **info):
+        for callback in self._subscribers[event]:
+            try:
+                callback(event, info)
+            except Exception:
+                logger.exception('Instrumentation callback for %s failed', event)
+
+    def _record(self, event, info):
+        name = endpoint_name(info['method'], info['uri'])
+        with self._lock:
+            stats = self._endpoints.get(name)
+            if stats is None:
+                stats = self._endpoints[name] = _EndpointStats()
+
+            if event == REQUEST_START:
+                stats.requests += 1
+                stats.bytes_sent += info.get('request_bytes') or 0
+            elif event == RESPONSE_RECEIVED:
+                stats.latency_ms.add(info['elapsed'] * 1000)
+                stats.ttfb_ms.add(info['ttfb'] * 1000)
+            elif event == DECODED:
+                stats.bytes_received += info['response_bytes']
+                stats.decode_seconds += info['decode_seconds']
+            elif event == RETRIED:
+                stats.retries += 1
+            elif event == ERROR:
+                stats.errors += 1
+
+    def stats(self):
+        """ per endpoint metrics, e.g. stats()['GET /v0.2/groups/{id}/']['latency_ms']['p99'] """
+        with self._lock:
+            return dict((name, stats.as_dict()) for name, stats in self._endpoints.items())
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
@@ -0,0 +1,237 @@
+"""
+jsonstream - incremental decoding of result envelopes
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import codecs
+import json
+
+import logging
+logger = logging.getLogger(__name__)
+
+# bytes read from the socket at a time when streaming
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# compact the buffer once this much of it has been consumed
+_COMPACT_THRESHOLD = 256 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# what may follow a complete value, anything else after a number means it was cut short
+_DELIMITERS = ',:]}' + _WHITESPACE
+_NUMBER_START = '-0123456789'
+
+
+class JSONStream(object):
+    def __init__(self, chunks, key='data', on_close=None):
+        """
+        Decodes a {"data": [...], "meta": {...}} envelope incrementally
+
+        Iterating yields the items of the data array one at a time as they are read from
+        chunks, so only the item being decoded is held in memory rather than the whole body.
+        The other keys of the envelope (e.g. meta) are available through get() and [] once
+        they have been read, keys after the data array are only known once iteration ends.
+
+        This looks enough like a decoded envelope to be used in its place:
+        'data' in stream, stream['data'] and stream.get('meta') all work.
+
+        :param chunks: iterable of bytes, e.g. response.iter_content()
+        :param key: the key of the array to stream
+        :param on_close: called once the stream is exhausted or abandoned
+        """
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._scanner = json.JSONDecoder()
+        self._key = key
+        self._on_close = on_close
+
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+        self._envelope = {}
+        self._started = False
+        self._streaming = False
+        self._consumed = False
+        self._done = False
+
+        # read up to the start of the data array so we know what we are dealing with
+        self._read_envelope()
+
+    def __contains__(self, key):
+        return key in self._envelope or (key == self._key and self._streaming)
+
+    def __getitem__(self, key):
+        if key == self._key and self._streaming:
+            return iter(self)
+
+        return self._envelope[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @property
+    def is_list(self):
+        """ True if the data key holds an array which is streamed by iterating """
+        return self._streaming
+
+    @property
+    def envelope(self):
+        """ The keys of the envelope read so far, not including a streamed data array """
+        return self._envelope
+
+    def __iter__(self):
+        if not self._streaming:
+            return
+
+        if self._consumed:
+            raise RuntimeError('A JSONStream can only be iterated once')
+        self._consumed = True
+
+        try:
+            if not self._expect_array_end():
+                while True:
+                    yield self._decode_value()
+                    if self._expect_array_end():
+                        break
+                    self._expect(',')
+
+            self._streaming = False
+            self._read_envelope()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._on_close is not None:
+            on_close = self._on_close
+            self._on_close = None
+            on_close()
+
+    def _fill(self):
+        """ read another chunk into the buffer, returns False at the end of the stream """
+        if self._eof:
+            return False
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+
+            if self._pos > _COMPACT_THRESHOLD:
+                self._buf = self._buf[self._pos:]
+                self._pos = 0
+
+            self._buf += self._decoder.decode(chunk)
+            return True
+
+        self._eof = True
+        self._buf += self._decoder.decode(b'', True)
+        return False
+
+    def _peek(self):
+        """ skip whitespace and return the next character without consuming it """
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+
+            if pos < len(buf):
+                return buf[pos]
+
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON stream')
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError('Expecting %r at position %d of JSON stream' % (char, self._pos))
+        self._pos += 1
+
+    def _expect_array_end(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return True
+        return False
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._scanner.raw_decode(self._buf, self._pos)
+            except ValueError:
+                # most likely the value continues in the next chunk
+                if not self._fill():
+                    raise
+                continue
+
+            # a value at the very end of the buffer may continue in the next chunk, and so
+            # may a number cut after its '.' or exponent, '1.' decodes as 1 leaving '.' behind
+            buf = self._buf
+            if (end == len(buf) or (buf[self._pos] in _NUMBER_START and buf[end] not in _DELIMITERS)) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def _read_envelope(self):
+        """ read keys until the end of the envelope or the start of the data array """
+        if self._done:
+            return
+
+        if not self._started:
+            self._started = True
+            self._expect('{')
+            if self._peek() == '}':
+                self._pos += 1
+                self._finish()
+                return
+        elif self._peek() == '}':
+            self._pos += 1
+            self._finish()
+            return
+        else:
+            self._expect(',')
+
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+
+            if key == self._key and self._peek() == '[':
+                self._pos += 1
+                self._streaming = True
+                return
+
+            self._envelope[key] = self._decode_value()
+
+            if self._peek() == '}':
+                self._pos += 1
+                self._finish()
+                return
+            self._expect(',')
+
+    def _finish(self):
+        self._done = True
+        self._buf = ''
+        self._pos = 0
+        self.close()
@@ -0,0 +1,168 @@
+"""
+keypool - spread calls over several API keys
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import time
+
+from .throttle import TokenBucket
+
+import logging
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = 'round_robin'
+LEAST_USED = 'least_used'
+
+# seconds a key is kept out of rotation after a 429 without a Retry-After header
+DEFAULT_COOLDOWN = 60
+
+
+def mask_key(key):
+    """ enough of a key to tell keys apart in logs and stats without leaking it """
+    return '%s...' % key[:4] if len(key) > 8 else '...'
+
+
+class _PooledKey(object):
+    __slots__ = ('key', 'bucket', 'in_flight', 'requests', 'throttled', 'cooldown_until')
+
+    def __init__(self, key, bucket):
+        self.key = key
+        self.bucket = bucket
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.cooldown_until = 0
+
+
+class KeyPool(object):
+    def __init__(self, keys, strategy=ROUND_ROBIN, rate=None, capacity=None, cooldown=DEFAULT_COOLDOWN):
+        """
+        A set of API keys calls are spread across, each with its own rate budget
+
+            api = StackApi(key_pool=KeyPool(['key1', 'key2', 'key3'], rate=5))
+
+        Each call takes a key, either the next one in turn (round_robin) or the one with
+        the fewest calls in flight (least_used).  A key whose calls got a 429 is taken out
+        of rotation for the Retry-After delay, or cooldown seconds, and calls move to the
+        other keys.  When no key is usable the call waits for the first one to free up.
+
+        :param keys: the API keys
+        :param strategy: ROUND_ROBIN or LEAST_USED
+        :param rate: calls per second allowed for each key, None for no limit
+        :param capacity: burst allowed for each key, see TokenBucket
+        :param cooldown: seconds a throttled key sits out when the server gives no Retry-After
+        """
+        if not keys:
+            raise ValueError('KeyPool needs at least one key')
+        if strategy not in (ROUND_ROBIN, LEAST_USED):
+            raise ValueError('Unknown strategy %r, expected %s or %s' % (strategy, ROUND_ROBIN, LEAST_USED))
+
+        self._keys = [_PooledKey(key, TokenBucket(rate, capacity) if rate else None) for key in keys]
+        self._by_key = dict((pooled.key, pooled) for pooled in self._keys)
+        self._strategy = strategy
+        self._cooldown = cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _candidates(self):
+        if self._strategy == LEAST_USED:
+            return sorted(self._keys, key=lambda pooled: (pooled.in_flight, pooled.requests))
+
+        return self._keys[self._next:] + self._keys[:self._next]
+
+    def _pick(self, now):
+        """ return (key, 0) for a usable key or (None, seconds until one may be usable) """
+        wait = None
+        for pooled in self._candidates():
+            if pooled.cooldown_until > now:
+                key_wait = pooled.cooldown_until - now
+            elif pooled.bucket is not None:
+                key_wait = pooled.bucket.try_acquire()
+            else:
+                key_wait = 0
+
+            if not key_wait:
+                if self._strategy == ROUND_ROBIN:
+                    self._next = (self._keys.index(pooled) + 1) % len(self._keys)
+                return pooled, 0
+
+            wait = key_wait if wait is None else min(wait, key_wait)
+
+        return None, wait
+
+    def acquire(self, timeout=None):
+        """
+        Take a key for one call, waiting until one is usable, pass it to release() afterwards
+
+        :param timeout: give up after this many seconds and return None
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                pooled, wait = self._pick(time.time())
+                if pooled is not None:
+                    pooled.in_flight += 1
+                    pooled.requests += 1
+                    return pooled.key
+
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+
+            time.sleep(wait)
+
+    def release(self, key):
+        with self._lock:
+            pooled = self._by_key.get(key)
+            if pooled is not None and pooled.in_flight:
+                pooled.in_flight -= 1
+
+    def throttled(self, key, seconds=None):
+        """ The server answered 429 for key, keep it out of rotation for seconds (or the default cooldown) """
+        if seconds is None:
+            seconds = self._cooldown
+
+        with self._lock:
+            pooled = self._by_key.get(key)
+            if pooled is None:
+                return
+
+            pooled.throttled += 1
+            pooled.cooldown_until = max(pooled.cooldown_until, time.time() + seconds)
+
+        logger.info('API key %s throttled, out of rotation for %.1fs', mask_key(key), seconds)
+
+    def stats(self):
+        """ per key call counts, named by position and masked key, e.g. '0:abcd...' """
+        now = time.time()
+        with self._lock:
+            return dict(('%d:%s' % (index, mask_key(pooled.key)), {
+                'requests': pooled.requests,
+                'in_flight': pooled.in_flight,
+                'throttled': pooled.throttled,
+                'cooldown_remaining': max(0, pooled.cooldown_until - now),
+            }) for index, pooled in enumerate(self._keys))
@@ -0,0 +1,165 @@
+"""
+resolver - batched name resolution with a local index
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+from .bulk import run_bulk, DEFAULT_CONCURRENCY
+from .coalesce import SingleFlight
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 100000
+
+
+class Resolver(object):
+    def __init__(self, api, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, concurrency=DEFAULT_CONCURRENCY):
+        """
+        Resolves resource names through api.Resolve and remembers the answers
+
+            resolver = Resolver(api, ttl=600)
+            resolved = resolver.resolve_many(hostnames)
+            for resource in resolved['web-1']:
+                print resource.id
+
+        Every name maps to the list of all resources with that name, which may be several
+        across zones and resource types, or none.  Answers, empty ones included, are kept for
+        ttl seconds in an LRU index of max_entries names so repeated lookups never leave the
+        process.  Names missing from the index are resolved concurrently and a name requested
+        by several threads at once is only resolved once.
+
+        The resources returned are shared between callers, copy them before changing them.
+
+        :param api: the StackApi to resolve with
+        :param ttl: seconds a resolved name is kept
+        :param max_entries: number of names kept, least recently used are dropped first
+        :param concurrency: maximum number of resolve calls in flight at once
+        """
+        self._api = api
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._concurrency = concurrency
+
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return self._lookup(name, count=False) is not None
+
+    def _lookup(self, name, count=True):
+        with self._lock:
+            entry = self._index.get(name)
+            if entry is not None and entry[0] > time.time():
+                # reinsert to mark the name as most recently used
+                self._index[name] = self._index.pop(name)
+                if count:
+                    self.hits += 1
+                return entry[1]
+
+            if count:
+                self.misses += 1
+            return None
+
+    def _store(self, name, resources):
+        with self._lock:
+            self._index.pop(name, None)
+            self._index[name] = (time.time() + self._ttl, resources)
+            while len(self._index) > self._max_entries:
+                self._index.popitem(last=False)
+
+    def _fetch(self, name):
+        def call():
+            result = self._api.Resolve.POST({'name': name})
+            if isinstance(result, dict):
+                result = [result]
+            resources = [self._api._wrap_resource_data(item) for item in result or []]
+            self._store(name, resources)
+            return resources
+
+        return self._single_flight.do(name, call)[0]
+
+    def resolve(self, name):
+        """ Return the list of resources called name """
+        resources = self._lookup(name)
+        if resources is None:
+            resources = self._fetch(name)
+        return resources
+
+    def resolve_many(self, names, ignore_errors=False):
+        """
+        Return a dict of name to the list of resources with that name
+
+        Names not in the index are resolved concurrently.  If a call fails the first error
+        is raised once every call finished, unless ignore_errors is True in which case the
+        names that failed are left out of the result.
+        """
+        resolved = {}
+        missing = []
+        for name in names:
+            if name in resolved:
+                continue
+            resources = self._lookup(name)
+            if resources is None:
+                missing.append(name)
+            resolved[name] = resources
+
+        error = None
+        for result in run_bulk(self._fetch, missing, concurrency=self._concurrency):
+            if result.ok:
+                resolved[result.item] = result.result
+            else:
+                del resolved[result.item]
+                logger.warning('Could not resolve %s: %s', result.item, result.error)
+                error = error or result.error
+
+        if error is not None and not ignore_errors:
+            raise error
+
+        return resolved
+
+    def invalidate(self, name=None):
+        """ Forget name, or every name if None """
+        with self._lock:
+            if name is None:
+                self._index.clear()
+            else:
+                self._index.pop(name, None)
+
+    def stats(self):
+        return {
+            'entries': len(self._index),
+            'hits': self.hits,
+            'misses': self.misses,
+            'calls': self._single_flight.calls,
+            'coalesced': self._single_flight.coalesced,
+        }
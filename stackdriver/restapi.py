@@ -22,11 +22,21 @@ under the License.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import copy
+import os
+import threading
+import time
 import types
 
 import json
 
+from .jsonstream import JSONStream, DEFAULT_CHUNK_SIZE
+from .coalesce import SingleFlight
+from .retry import RetryPolicy
+from .deadline import current_deadline, DeadlineExceeded
+from . import instrumentation as events
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -41,12 +51,25 @@ def transport_func(func):
     func._is_transport_func = True
     return func
 
+# number of per-host connection pools to keep around and the number of
+# connections to keep open in each of those pools
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
 class RestApi(object):
 
-    def __init__(self, entrypoint_uri, version=None, apikey=None, username=None, password=None, useragent=None, transport_controller=None, transport_userdata=None):
+    def __init__(self, entrypoint_uri, version=None, apikey=None, username=None, password=None, useragent=None, transport_controller=None, transport_userdata=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False, keep_alive=True, cache=None, json_codec=None,
+                 retry_policy=None, rate_limiter=None, coalesce=False, instrumentation=None, identity_map=None, compression=None,
+                 key_pool=None, timeout=None, hedge_policy=None, circuit_breaker=None):
         """
         Base class for accessing REST services
 
+        All calls made through an instance share one keep-alive connection pool.  The pool is
+        created lazily on first use and is recreated if the process forks, so pre-fork workers
+        never share sockets with their parent.  Call close() (or use the instance as a context
+        manager) to release the connections.
+
         :param entrypoint_path: The http or https uri to the api
         :param version: version of the api we support
         :param apikey: the stackdriver apikey to use for authentication
@@ -54,6 +77,34 @@ class RestApi(object):
         :param password: password for basic auth - this is here for completeness but for the stackdriver apis auth should be done using the apikey
         :param transport_controller: if defined run this function before each network call
         :param transport_userdata: data to send to the transport_controller
+        :param pool_connections: number of per-host connection pools to cache
+        :param pool_maxsize: maximum number of connections kept open per host
+        :param pool_block: if True block when all pooled connections to a host are busy
+            instead of opening extra, non-pooled connections
+        :param keep_alive: if False ask the server to close the connection after each call
+        :param cache: a ResponseCache used for GET calls, POST, PUT and DELETE invalidate the
+            entries of the resources they modify
+        :param json_codec: module or object with loads and dumps functions used to decode
+            responses and encode request bodies, e.g. ujson.  Defaults to the json module.
+            Can also be set per call with the codec parameter.
+        :param retry_policy: a RetryPolicy deciding which failed calls are retried and when
+        :param rate_limiter: a TokenBucket every call takes a token from, share one bucket
+            between clients using the same quota.  It is paused when the server answers 429.
+        :param coalesce: if True identical GETs (same uri, params and apikey) made while one is
+            already in flight wait for it and share its result instead of calling the server
+        :param instrumentation: an Instrumentation whose hooks are called around every network
+            attempt and which collects per endpoint metrics
+        :param identity_map: an IdentityMap shared by everything wrapping results from this client
+        :param compression: a Compression used to compress large POST and PUT bodies and to
+            measure how well responses compress, see stats()
+        :param key_pool: a KeyPool whose keys are used in turn in place of apikey, a key
+            answered with 429 is rested.  The call is only retried with another key if a
+            retry_policy is set, otherwise the 429 is raised as an HTTPError.
+        :param timeout: default timeout of every call in seconds, or a (connect, read) tuple,
+            None waits forever.  Can also be set per call with the timeout parameter.
+        :param hedge_policy: a HedgePolicy sending a second copy of GETs slower than most
+        :param circuit_breaker: a CircuitBreaker failing calls fast with CircuitOpenError
+            after repeated failures
         """
 
         # always end with a slash
@@ -68,6 +119,29 @@ class RestApi(object):
         self._version = version
         self._useragent = useragent
 
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._keep_alive = keep_alive
+        self._cache = cache
+        self._codec = json_codec or json
+        self._retry_policy = retry_policy
+        self._rate_limiter = rate_limiter
+        self._single_flight = SingleFlight() if coalesce else None
+        self._instrumentation = instrumentation
+        self.identity_map = identity_map
+        self._compression = compression
+        self._key_pool = key_pool
+        self._timeout = timeout
+        self._hedge_policy = hedge_policy
+        self._circuit_breaker = circuit_breaker
+
+        self._base_headers, self._post_headers = self._build_base_headers()
+
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+
         if transport_controller:
             self._decorate_transport_funcs(transport_controller, transport_userdata)
 
@@ -82,27 +156,321 @@ class RestApi(object):
                 continue
 
             method = getattr(self, method_name, None)
-            if isinstance(method, types.MethodType):
+            if isinstance(method, types.MethodType) and getattr(method, '_is_transport_func', False):
                 setattr(self, method_name, _wrap_transport_decorator(method, controller, userdata))
 
-    def _merge_headers(self, extra, is_post=False):
-        headers = {}
-        if extra is not None:
-            headers = copy.copy(extra)
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self._pool_connections,
+                              pool_maxsize=self._pool_maxsize,
+                              pool_block=self._pool_block)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _get_session(self):
+        """ Return the session owned by the current process
+
+            A forked child inherits the parent's pooled sockets, so if the pid changed since the
+            session was created we drop the inherited session (without closing sockets the parent
+            still uses) and start a fresh pool.
+        """
+        pid = os.getpid()
+        session = self._session
+        if session is not None and self._session_pid == pid:
+            return session
+
+        with self._session_lock:
+            if self._session is None or self._session_pid != pid:
+                self._session = self._create_session()
+                self._session_pid = pid
+
+            return self._session
+
+    def _send(self, method, uri, **kwargs):
+        """ Make the call, waiting for the rate limiter and retrying as the retry policy allows """
+        policy = self._retry_policy
+        limiter = self._rate_limiter
+        key_pool = self._key_pool
+        breaker = self._circuit_breaker
+        hedge = self._hedge_policy if method == 'GET' and not kwargs.get('stream') else None
+        deadline = current_deadline()
+        timeout = kwargs.get('timeout')
+        attempt = 0
+
+        while True:
+            if deadline is not None:
+                deadline.check()
+
+            # wait for the limiter and a key before taking a circuit breaker trial call so
+            # running out of time while waiting can not leave the trial unreturned
+            if limiter is not None:
+                if deadline is None:
+                    limiter.acquire()
+                elif not limiter.acquire(timeout=deadline.remaining()):
+                    raise DeadlineExceeded('Deadline exceeded waiting for the rate limiter')
+
+            key = None
+            if key_pool is not None:
+                key = key_pool.acquire(timeout=deadline.remaining() if deadline is not None else None)
+                if key is None:
+                    raise DeadlineExceeded('Deadline exceeded waiting for an API key')
+                kwargs['headers']['x-stackdriver-apikey'] = key
+
+            try:
+                if breaker is not None:
+                    breaker.before_call()
+
+                budget_limited = False
+                if deadline is not None:
+                    kwargs['timeout'] = deadline.timeout(timeout)
+                    budget_limited = kwargs['timeout'] != timeout
+
+                try:
+                    if hedge is not None:
+                        r = hedge.call(lambda: self._attempt(method, uri, attempt, **kwargs))
+                    else:
+                        r = self._attempt(method, uri, attempt, **kwargs)
+                except Exception as e:
+                    if breaker is not None:
+                        if deadline is not None and (deadline.expired or (budget_limited and isinstance(e, requests.Timeout))):
+                            # timed out on the caller's budget, that says nothing about the API
+                            breaker.release()
+                        else:
+                            breaker.record(error=e)
+                    if not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                        raise
+                    if deadline is not None and deadline.expired and not isinstance(e, DeadlineExceeded):
+                        raise DeadlineExceeded('Deadline exceeded during %s %s: %s' % (method, uri, e))
+                    if policy is None or not policy.should_retry(method, attempt, error=e):
+                        raise
+                    delay = policy.backoff(attempt)
+                    reason = str(e)
+                else:
+                    if breaker is not None:
+                        breaker.record(response=r)
+
+                    if r.status_code == 429 and key_pool is not None:
+                        key_pool.throttled(key, RetryPolicy.retry_after(r))
+
+                    if policy is None or not policy.should_retry(method, attempt, response=r):
+                        return r
+
+                    delay = policy.backoff(attempt, r)
+                    reason = r.status_code
+                    if r.status_code == 429:
+                        if key_pool is not None:
+                            # only that key is throttled, the next attempt uses another one
+                            delay = 0
+                        elif limiter is not None:
+                            # hold back every thread sharing the limiter, not just this one
+                            limiter.pause(delay)
+                    r.close()
+            finally:
+                if key is not None:
+                    key_pool.release(key)
+
+            if deadline is not None and delay >= deadline.remaining():
+                raise DeadlineExceeded('Deadline exceeded, can not retry %s %s in %.2fs: %s' % (method, uri, delay, reason))
+
+            attempt += 1
+            logger.info('Retrying %s %s in %.2fs (attempt %d): %s', method, uri, delay, attempt, reason)
+            if self._instrumentation is not None:
+                self._instrumentation.emit(events.RETRIED, method=method, uri=uri, attempt=attempt, delay=delay, reason=reason)
+            time.sleep(delay)
+
+    def _attempt(self, method, uri, attempt, **kwargs):
+        """ A single network call, reported to the instrumentation hooks if there are any """
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return self._get_session().request(method, uri, **kwargs)
+
+        data = kwargs.get('data')
+        instrumentation.emit(events.REQUEST_START, method=method, uri=uri, attempt=attempt,
+                             request_bytes=len(data) if data else 0)
+
+        start = time.time()
+        try:
+            r = self._get_session().request(method, uri, **kwargs)
+        except Exception as e:
+            instrumentation.emit(events.ERROR, method=method, uri=uri, attempt=attempt, status=None, error=e)
+            raise
+
+        instrumentation.emit(events.RESPONSE_RECEIVED, method=method, uri=uri, attempt=attempt, status=r.status_code,
+                             ttfb=r.elapsed.total_seconds(), elapsed=time.time() - start)
+        if r.status_code >= 400:
+            instrumentation.emit(events.ERROR, method=method, uri=uri, attempt=attempt, status=r.status_code, error=None)
+
+        return r
+
+    def _request(self, method, uri, stream=False, codec=None, **kwargs):
+        r = self._send(method, uri, stream=stream, **kwargs)
+        r.raise_for_status()
+        return self._decode(r, stream, codec)
+
+    def _decode(self, r, stream=False, codec=None):
+        """ Decode the response body, or return a JSONStream over it if streaming """
+        if stream:
+            return JSONStream(r.iter_content(DEFAULT_CHUNK_SIZE), on_close=r.close)
+
+        if self._compression is not None:
+            self._compression.record_response(r)
+
+        if self._instrumentation is None:
+            return (codec or self._codec).loads(r.content)
+
+        body = r.content
+        start = time.time()
+        result = (codec or self._codec).loads(body)
+        self._instrumentation.emit(events.DECODED, method=r.request.method, uri=r.url,
+                                   response_bytes=len(body), decode_seconds=time.time() - start)
+        return result
+
+    def _encode(self, data, codec=None, headers=None):
+        """ Serialize data, compressing it if it is large enough and the client has a Compression """
+        body = (codec or self._codec).dumps(data)
+        if self._compression is None:
+            return body
+
+        body, encoding = self._compression.compress(body)
+        if encoding is not None:
+            headers['content-encoding'] = encoding
+        return body
+
+    @staticmethod
+    def _get_key(uri, params, headers):
+        """ identifies GETs which get the same answer: same uri, params and credentials """
+        if params:
+            # requests sends list values as repeated parameters, they have to be hashable here
+            params = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in params.items() if v is not None))
+        return (uri, params or None, headers.get('x-stackdriver-apikey'))
+
+    def _coalesced_get(self, endpoint, uri, params, headers, codec=None, timeout=None):
+        def fetch():
+            if self._cache is not None:
+                return self._cached_get(endpoint, uri, params, headers, codec, timeout)
+            return self._request('GET', uri, codec=codec, params=params, headers=headers, timeout=timeout)
+
+        # every caller gets its own copy to wrap and modify, made before the leader's copy
+        # is handed back and starts being changed by lazy wrapping
+        return self._single_flight.do(self._get_key(uri, params, headers), fetch, copy=copy.deepcopy)[0]
+
+    def _cached_get(self, endpoint, uri, params, headers, codec=None, timeout=None):
+        cache = self._cache
+        codec = codec or self._codec
+        key = self._get_key(uri, params, headers)
+
+        body, validators = cache.lookup(key)
+        if body is not None:
+            return codec.loads(body)
+
+        if validators:
+            headers.update(validators)
+
+        r = self._send('GET', uri, params=params, headers=headers, timeout=timeout)
+        if r.status_code == 304 and validators:
+            body = cache.revalidated(key, endpoint)
+            if body is not None:
+                return codec.loads(body)
+
+            # evicted while we were revalidating, fetch it again unconditionally
+            for header in validators:
+                del headers[header]
+            r = self._send('GET', uri, params=params, headers=headers, timeout=timeout)
+
+        r.raise_for_status()
+        cache.store(key, endpoint, r.content, r.headers.get('etag'), r.headers.get('last-modified'))
+        return self._decode(r, codec=codec)
 
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def instrumentation(self):
+        return self._instrumentation
+
+    @property
+    def compression(self):
+        return self._compression
+
+    @property
+    def key_pool(self):
+        return self._key_pool
+
+    @property
+    def circuit_breaker(self):
+        return self._circuit_breaker
+
+    def stats(self):
+        """ Metrics collected by the instrumentation, the cache and request coalescing """
+        stats = {}
+        if self._instrumentation is not None:
+            stats['endpoints'] = self._instrumentation.stats()
+        if self._cache is not None:
+            stats['cache'] = self._cache.stats()
+        if self._single_flight is not None:
+            stats['coalesce'] = self._single_flight.stats()
+        if self._compression is not None:
+            stats['compression'] = self._compression.stats()
+        if self._key_pool is not None:
+            stats['keys'] = self._key_pool.stats()
+        if self._hedge_policy is not None:
+            stats['hedging'] = self._hedge_policy.stats()
+        if self._circuit_breaker is not None:
+            stats['circuit'] = self._circuit_breaker.stats()
+        return stats
+
+    def close(self):
+        """ Close all pooled connections owned by this process """
+        with self._session_lock:
+            session = self._session
+            self._session = None
+
+            if session is not None and self._session_pid == os.getpid():
+                session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _build_base_headers(self):
+        """ Build the headers sent with every call, these never change so are built once """
+        headers = {}
         if self._apikey:
             headers['x-stackdriver-apikey'] = self._apikey
         headers['x-stackdriver-version'] = self._version
 
-        if is_post:
-            headers['accept'] = 'application/json, text/plain, */*'
-            headers['content-type'] = 'application/json'
-
         if self._useragent:
             headers['user-agent'] = self._useragent
 
+        if not self._keep_alive:
+            headers['connection'] = 'close'
+
+        if self._compression is not None:
+            headers['accept-encoding'] = 'gzip, deflate'
+
+        post_headers = dict(headers)
+        post_headers['accept'] = 'application/json, text/plain, */*'
+        post_headers['content-type'] = 'application/json'
+
+        return headers, post_headers
+
+    def _merge_headers(self, extra, is_post=False):
+        base = self._post_headers if is_post else self._base_headers
+        if not extra:
+            return dict(base)
+
+        headers = copy.copy(extra)
+        headers.update(base)
         return headers
 
+    def _invalidate(self, endpoint):
+        if self._cache is not None:
+            self._cache.invalidate(endpoint)
+
     def _gen_full_endpoint(self, endpoint_path):
         if endpoint_path.startswith('/'):
             endpoint_path = endpoint_path[1:]
@@ -110,44 +478,64 @@ class RestApi(object):
         return '%s%s' % (self._entrypoint_uri, endpoint_path)
 
     @transport_func
-    def get(self, endpoint, params=None, headers=None):
+    def get(self, endpoint, params=None, headers=None, stream=False, codec=None, timeout=None):
+        """
+        GET the endpoint and return the decoded body
+
+        :param stream: if True return a JSONStream which decodes the items of the data array
+            as they are read from the socket instead of decoding the whole body at once.
+            Streamed calls bypass the cache and are never coalesced.
+        :param codec: json codec to decode with instead of the client's
+        :param timeout: seconds to wait for the server instead of the client's timeout
+        """
         headers = self._merge_headers(headers)
         uri = self._gen_full_endpoint(endpoint)
+        timeout = self._timeout if timeout is None else timeout
 
         logger.debug('GET %s', uri, extra={'params': params})
-        r = requests.get(uri, params=params, headers=headers)
-        r.raise_for_status()
-        return r.json()
+        if self._single_flight is not None and not stream:
+            return self._coalesced_get(endpoint, uri, params, headers, codec, timeout)
+
+        if self._cache is not None and not stream:
+            return self._cached_get(endpoint, uri, params, headers, codec, timeout)
+
+        return self._request('GET', uri, stream=stream, codec=codec, params=params, headers=headers, timeout=timeout)
 
     @transport_func
-    def post(self, endpoint, data=None, headers=None):
+    def post(self, endpoint, data=None, headers=None, stream=False, codec=None, timeout=None):
         headers = self._merge_headers(headers, is_post=True)
         uri = self._gen_full_endpoint(endpoint)
+        timeout = self._timeout if timeout is None else timeout
 
         logger.debug('POST %s', uri, extra={'data': data})
-        r = requests.post(uri, data=json.dumps(data), headers=headers)
-        r.raise_for_status()
-        return r.json()
+        try:
+            return self._request('POST', uri, stream=stream, codec=codec, data=self._encode(data, codec, headers), headers=headers, timeout=timeout)
+        finally:
+            self._invalidate(endpoint)
 
     @transport_func
-    def put(self, endpoint, data=None, headers=None):
+    def put(self, endpoint, data=None, headers=None, codec=None, timeout=None):
         headers = self._merge_headers(headers, is_post=True)
         uri = self._gen_full_endpoint(endpoint)
+        timeout = self._timeout if timeout is None else timeout
 
         logger.debug('PUT %s', uri, extra={'data': data})
-        r = requests.put(uri, data=json.dumps(data), headers=headers)
-        r.raise_for_status()
-        return r.json()
+        try:
+            return self._request('PUT', uri, codec=codec, data=self._encode(data, codec, headers), headers=headers, timeout=timeout)
+        finally:
+            self._invalidate(endpoint)
 
     @transport_func
-    def delete(self, endpoint, headers=None):
+    def delete(self, endpoint, headers=None, codec=None, timeout=None):
         headers = self._merge_headers(headers, is_post=True)
         uri = self._gen_full_endpoint(endpoint)
+        timeout = self._timeout if timeout is None else timeout
 
         logger.debug('DELETE %s', uri)
-        r = requests.delete(uri, headers=headers)
-        r.raise_for_status()
-        return r.json()
+        try:
+            return self._request('DELETE', uri, codec=codec, headers=headers, timeout=timeout)
+        finally:
+            self._invalidate(endpoint)
 
     @property
     def api_version(self):
@@ -0,0 +1,285 @@
+"""
+resultset - lazy, paginated access to list results
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+
+from .deadline import current_deadline, carry
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class _PageFetcher(object):
+    def __init__(self, fetch, endpoint, params):
+        """ Fetches a page on a background thread so the caller can keep working on the current one """
+        self._result = None
+        self._error = None
+
+        self._thread = threading.Thread(target=self._run, args=(fetch, endpoint, params, current_deadline()))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, fetch, endpoint, params, deadline):
+        try:
+            with carry(deadline):
+                self._result = fetch(endpoint, params)
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+        return self._result
+
+
+class ResultSet(object):
+    def __init__(self, interface, endpoint, result, params=None, headers=None, prefetch=False, stream=False, codec=None, timeout=None):
+        """
+        Returned by list calls, iterates over every item of every page of the result
+
+        Pages are requested lazily as iteration reaches the end of the previous page and are
+        dropped once consumed so memory use stays flat regardless of the size of the collection.
+        If prefetch is True the next page is requested on a background thread while the current
+        one is being consumed.  The first page is kept so the result set can be iterated again.
+
+        len(), indexing and truth tests work like on a list but fetch and keep every page the
+        first time they are used, iterate instead to keep memory flat.
+
+        If stream is True each page is a JSONStream whose items are decoded as they are read
+        from the socket.  A page's meta block may follow its data in which case the next page
+        can only be requested, and prefetched, once the current one has been read.
+
+        Pagination follows the meta block of each page, either a 'next' (or 'next_page') link
+        or a 'page' number with a 'pages' (or 'total_pages') count.
+
+        :param interface: the AnonStackInterface used to make calls and wrap items
+        :param endpoint: the versioned endpoint the first page was requested from
+        :param result: the unwound first page, a dict with data and meta keys
+        :param timeout: per-call timeout used for the following pages, None for the client's
+        """
+        self._interface = interface
+        self._endpoint = endpoint
+        self._params = params
+        self._headers = headers
+        self._prefetch = prefetch
+        self._stream = stream
+        self._codec = codec
+        self._timeout = timeout
+
+        self._first_page = result
+        self._first_page_consumed = False
+        self._items = None
+
+    def __iter__(self):
+        if self._items is not None:
+            return iter(self._items)
+        return self._iter_lazily()
+
+    def _iter_lazily(self):
+        # list() asks for the length after iter() and before the first item, which
+        # already fetched every page, so only start paging if that did not happen
+        items = self._iter_pages() if self._items is None else self._items
+        for item in items:
+            yield item
+
+    def _iter_pages(self):
+        wrap = self._interface._wrap_rest_data_one
+        for data in self.pages():
+            for item in data:
+                yield wrap(item)
+
+    def _materialize(self):
+        if self._items is None:
+            self._items = list(self._iter_pages())
+        return self._items
+
+    def __len__(self):
+        return len(self._materialize())
+
+    def __getitem__(self, index):
+        return self._materialize()[index]
+
+    def __bool__(self):
+        if self._items is None and not self._stream:
+            if self._first_page['data']:
+                return True
+            if not self._next_page(self.meta, self._params):
+                return False
+        return bool(self._materialize())
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        if self._stream:
+            return 'ResultSet(<streamed from %s>)' % self._endpoint
+
+        items = [self._interface._wrap_rest_data_one(item) for item in self._first_page['data']]
+        more = ', ...' if self._next_page(self.meta, self._params) else ''
+        return 'ResultSet(%s%s)' % (repr(items)[1:-1], more)
+
+    @property
+    def meta(self):
+        """ The meta block of the first page """
+        return self._first_page.get('meta') or {}
+
+    @property
+    def total(self):
+        """ The total number of items in the collection if the server reported it, otherwise None """
+        meta = self.meta
+        for key in ('total', 'total_count', 'count'):
+            if key in meta:
+                return meta[key]
+
+        return None
+
+    def all(self):
+        """ Fetch every page and return all the items as a list """
+        return list(self._materialize())
+
+    def pages(self):
+        """ Iterate over the raw data list of each page """
+        params = self._params
+        pending = None
+
+        page = self._first_page
+        if self._stream:
+            # a streamed page can only be read once so start again from the server
+            if self._first_page_consumed:
+                page = self._fetch(self._endpoint, params)
+            self._first_page_consumed = True
+
+        while True:
+            next_page = self._next_page(page.get('meta') or {}, params)
+            if next_page and self._prefetch:
+                pending = _PageFetcher(self._fetch, *next_page)
+
+            yield page['data']
+
+            if pending is not None:
+                page = pending.result()
+                pending = None
+            else:
+                # a streamed page's meta is only complete once its data was read
+                next_page = self._next_page(page.get('meta') or {}, params)
+                if not next_page:
+                    return
+
+                page = self._fetch(*next_page)
+
+            params = next_page[1]
+
+    def _fetch(self, endpoint, params):
+        result = self._interface._rest_client.get(endpoint, params=params, headers=self._headers, stream=self._stream, codec=self._codec,
+                                                  timeout=self._timeout)
+        self._interface._unwind_result(result)
+        return result
+
+    def _next_page(self, meta, params):
+        """ return the (endpoint, params) of the page after the one described by meta or None """
+        return next_page(meta, params, self._endpoint, self._interface._rest_client.entrypoint)
+
+
+def next_page(meta, params, endpoint, entrypoint):
+    """
+    return the (endpoint, params) of the page after the one described by meta or None
+
+    Pagination follows either a 'next' (or 'next_page') link or a 'page' number with a
+    'pages' (or 'total_pages') count.
+    """
+    next_link = meta.get('next') or meta.get('next_page')
+    if next_link:
+        # the link is relative to, or includes, the api entrypoint
+        if next_link.startswith(entrypoint):
+            next_link = next_link[len(entrypoint):]
+        return (next_link, None)
+
+    page = meta.get('page')
+    pages = meta.get('pages', meta.get('total_pages'))
+    if page is not None and pages is not None and int(page) < int(pages):
+        params = dict(params or {})
+        params['page'] = int(page) + 1
+        return (endpoint, params)
+
+    return None
+
+
+class LazyObjectList(Sequence):
+    def __init__(self, items, wrap):
+        """
+        A read only list of decoded items which are only wrapped when accessed
+
+        Once an item is wrapped the wrapped object replaces the decoded dict in the list so
+        each item is held in memory once, and wrapping cost is only paid for the items used.
+
+        :param items: the decoded list, it is owned by this object from now on
+        :param wrap: called to wrap a single item
+        """
+        self._items = items
+        self._wrap = wrap
+        self._pending = bytearray(b'\x01') * len(items)
+
+    def _get(self, index):
+        if self._pending[index]:
+            self._items[index] = self._wrap(self._items[index])
+            self._pending[index] = 0
+
+        return self._items[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self._items)))]
+
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError('list index out of range')
+
+        return self._get(index)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        for index in range(len(self._items)):
+            yield self._get(index)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, LazyObjectList)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return repr(list(self))
@@ -0,0 +1,107 @@
+"""
+retry - retry policy for failed and throttled calls
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from email.utils import parsedate_tz, mktime_tz
+import random
+import time
+
+import requests
+
+import logging
+logger = logging.getLogger(__name__)
+
+# methods which can be sent again without changing the result on the server
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# too many requests, bad gateway, service unavailable, gateway timeout
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class RetryPolicy(object):
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30, statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS, respect_retry_after=True):
+        """
+        Decides if and when a failed call is retried
+
+        Calls are retried after a connection error, a timeout or one of the retry statuses.
+        The delay is picked at random between 0 and backoff_factor * 2 ** attempt, capped at
+        max_backoff, so that clients which failed together do not retry together.  If the
+        server sent a Retry-After header that delay is used instead.
+
+        Only idempotent methods are retried by default.  A POST may already have been applied
+        by the time it failed, add it to methods only if your POSTs are safe to repeat
+        (e.g. Resolve queries).
+
+        :param max_retries: number of retries after the first attempt
+        :param backoff_factor: base delay in seconds
+        :param max_backoff: longest delay in seconds between two attempts
+        :param statuses: HTTP status codes to retry
+        :param methods: HTTP methods which may be retried
+        :param respect_retry_after: wait as long as the server's Retry-After header asks
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.respect_retry_after = respect_retry_after
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        """
+        :param attempt: number of retries made so far
+        :param response: the response if one was received
+        :param error: the exception raised if no response was received
+        """
+        if attempt >= self.max_retries or method.upper() not in self.methods:
+            return False
+
+        if error is not None:
+            return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+        return response is not None and response.status_code in self.statuses
+
+    def backoff(self, attempt, response=None):
+        """ Number of seconds to wait before retry number attempt + 1 """
+        if response is not None and self.respect_retry_after:
+            retry_after = self.retry_after(response)
+            if retry_after is not None:
+                return retry_after
+
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    @staticmethod
+    def retry_after(response):
+        """ parse the Retry-After header which is either a number of seconds or a date """
+        value = response.headers.get('retry-after')
+        if not value:
+            return None
+
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+
+        return max(0, mktime_tz(date) - time.time())
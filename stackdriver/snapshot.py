@@ -0,0 +1,199 @@
+"""
+snapshot - local copies of collections kept current with incremental syncs
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+from collections import OrderedDict
+import gzip
+import json
+import os
+import time
+
+from .resultset import ResultSet, LazyObjectList
+
+import logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# seconds subtracted from the last sync time when asking for changes, covers clock
+# skew between client and server and writes that were in flight during the last sync
+DEFAULT_SKEW = 60
+
+# seconds after which the whole collection is listed again, deletions the server no
+# longer reports are dropped at the latest then
+DEFAULT_FULL_SYNC_AFTER = 24 * 3600
+
+
+class Snapshot(object):
+    def __init__(self, path, since_param='modified_since', deleted_key='deleted_epoch', skew=DEFAULT_SKEW, full_sync_after=DEFAULT_FULL_SYNC_AFTER):
+        """
+        A collection saved to a local file and brought up to date by asking the server only
+        for what changed since the last sync:
+
+            users = Snapshot('/var/cache/myapp/users.ndjson.gz').sync(api.Users)
+
+        The first sync lists the whole collection.  Later syncs load the file, list the
+        collection with since_param set to the epoch of the previous sync, merge the changed
+        items by resource (or id) and drop those carrying a deleted_key timestamp.  If the
+        server ignored since_param and returned the whole collection, which shows as most of
+        the snapshot coming back unchanged, the snapshot is rebuilt from the listing instead
+        so items deleted meanwhile go away.
+
+        The file is gzipped JSON, a header line followed by one item per line, so it is
+        small on disk and is read and written a line at a time.  It is replaced atomically
+        so several workers can share one snapshot.
+
+        :param path: file the collection is stored in
+        :param since_param: list parameter asking the server for items changed since an epoch
+        :param deleted_key: item key holding the deletion time of a removed item
+        :param skew: seconds of overlap between consecutive syncs
+        :param full_sync_after: list the whole collection again when the snapshot is older
+            than this many seconds, in case the server forgets deletions after a while, None
+            to never do so
+        """
+        self.path = path
+        self.since_param = since_param
+        self.deleted_key = deleted_key
+        self.skew = skew
+        self.full_sync_after = full_sync_after
+
+        self.endpoint = None
+        self.synced_epoch = None
+
+    def load(self):
+        """ Return the saved items as an OrderedDict of key to item, empty if there is no snapshot """
+        items = OrderedDict()
+        self.endpoint = None
+        self.synced_epoch = None
+
+        if not os.path.exists(self.path):
+            return items
+
+        with gzip.open(self.path, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            if header.get('format') != SNAPSHOT_FORMAT:
+                logger.warning('Ignoring snapshot %s in unknown format %r', self.path, header.get('format'))
+                return items
+
+            for line in f:
+                item = json.loads(line.decode('utf-8'))
+                items[_item_key(item)] = item
+
+        self.endpoint = header.get('endpoint')
+        self.synced_epoch = header.get('synced_epoch')
+        return items
+
+    def save(self, items, endpoint, synced_epoch):
+        """ Write items (an iterable of dicts) to the snapshot file, replacing it atomically """
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        header = {'format': SNAPSHOT_FORMAT, 'endpoint': endpoint, 'synced_epoch': synced_epoch}
+
+        try:
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write((json.dumps(header) + '\n').encode('utf-8'))
+                for item in items:
+                    f.write((json.dumps(item, separators=(',', ':')) + '\n').encode('utf-8'))
+            os.rename(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.endpoint = endpoint
+        self.synced_epoch = synced_epoch
+
+    def sync(self, interface, params=None, headers=None, full=False):
+        """
+        Bring the snapshot of the interface's collection up to date and return its items
+
+        :param interface: the collection to list, e.g. api.Groups
+        :param params: extra list parameters, they must be the same on every sync
+        :param full: list the whole collection even if there is a usable snapshot
+        :return: a list of AnonStackObjects wrapped when accessed
+        """
+        endpoint = interface._versioned_endpoint(interface._endpoint)
+        items = self.load()
+
+        if self.endpoint not in (None, endpoint):
+            logger.warning('Snapshot %s holds %s, not %s, listing everything', self.path, self.endpoint, endpoint)
+            full = True
+        elif self.full_sync_after is not None and self.synced_epoch is not None and \
+                time.time() - self.synced_epoch > self.full_sync_after:
+            full = True
+
+        if full or self.synced_epoch is None:
+            items = OrderedDict()
+            since = None
+        else:
+            since = int(self.synced_epoch - self.skew)
+
+        list_params = dict(params or {})
+        if since is not None:
+            list_params[self.since_param] = since
+
+        # taken before listing so changes made while we list are picked up next time
+        synced_epoch = int(time.time())
+
+        # size of the snapshot before merging, used to tell a full listing from a list of changes
+        previous = len(items)
+        listed = OrderedDict()
+        unchanged = changed = removed = 0
+        for item in self._list(interface, list_params, headers):
+            key = _item_key(item)
+            if item.get(self.deleted_key):
+                if items.pop(key, None) is not None:
+                    removed += 1
+            else:
+                if items.get(key) == item:
+                    unchanged += 1
+                items[key] = item
+                listed[key] = item
+                changed += 1
+
+        if since is not None and unchanged * 2 > previous and unchanged * 2 > changed:
+            logger.info('%s ignored %s and returned the whole collection, rebuilding %s',
+                        endpoint, self.since_param, self.path)
+            removed = len(items) - len(listed)
+            items = listed
+
+        logger.debug('Synced %s from %s: %d changed, %d removed, %d total',
+                     self.path, endpoint, changed, removed, len(items))
+
+        self.save(items.values(), endpoint, synced_epoch)
+        return LazyObjectList(list(items.values()), interface._wrap_rest_data_one)
+
+    @staticmethod
+    def _list(interface, params, headers):
+        result = interface.LIST(params=params, headers=headers, stream=True)
+        if not isinstance(result, ResultSet):
+            raise TypeError('%s did not return a list' % interface._endpoint)
+
+        for data in result.pages():
+            for item in data:
+                yield item
+
+
+def _item_key(item):
+    key = item.get('resource')
+    if key is None:
+        key = item.get('id')
+    return key
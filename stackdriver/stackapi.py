@@ -21,13 +21,27 @@ specific language governing permissions and limitations
 under the License.
 """
 
+import hashlib
+import json
+
 from . import __version__
 
-from .restapi import RestApi
+from .restapi import RestApi, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from .resultset import ResultSet, LazyObjectList
+from .bulk import run_bulk, DEFAULT_CONCURRENCY
+from .jsonstream import JSONStream
+from .identity import IdentityMap
 
 import logging
 logger = logging.getLogger(__name__)
 
+# (rest_class, endpoint_prefix, api_version) -> (mapped rest class, endpoint, versioned prefix)
+# shared by every interface and object so wrapping results does not redo the string work
+_interface_templates = {}
+
+# resource collection name -> python class name, e.g. load_balancers -> Load_balancers
+_resource_classes = {}
+
 
 class AnonStackInterface(object):
     def __init__(self, rest_class, client, endpoint_prefix=''):
@@ -38,11 +52,20 @@ class AnonStackInterface(object):
         known objects in order to provide convenience functions for specific objects.
         """
 
-        self._rest_class = self._mapToRestClass(rest_class)
-        self._rest_client = client
+        key = (rest_class, endpoint_prefix, client.api_version)
+        template = _interface_templates.get(key)
+        if template is None:
+            mapped = self._mapToRestClass(rest_class)
 
-        # endpoint is always lowercase
-        self._endpoint = '%s%s/' % (endpoint_prefix, self._mapToRestClass(rest_class).lower())
+            # endpoint is always lowercase
+            endpoint = '%s%s/' % (endpoint_prefix, mapped.lower())
+            template = (mapped, endpoint, 'v%s/%s' % (client.api_version, endpoint))
+            _interface_templates[key] = template
+
+        # assigned through __dict__ to skip AnonStackObject.__setattr__, objects are created in bulk
+        attrs = self.__dict__
+        attrs['_rest_class'], attrs['_endpoint'], attrs['_versioned_prefix'] = template
+        attrs['_rest_client'] = client
 
     def __call__(self, data=None):
         """ If called with data create an AnonStackObject """
@@ -53,7 +76,7 @@ class AnonStackInterface(object):
         if 'resource' in data:
             self._isrestclass(data['resource'], self._rest_class)
 
-        return AnonStackObject(self._rest_class, self._rest_client, data)
+        return self._object_class(self._rest_class, self._rest_client, data)
 
     def __repr__(self):
         return '%s StackInterface (%s%s)' % (self._rest_class, self._rest_client.entrypoint, self._endpoint)
@@ -83,14 +106,14 @@ class AnonStackInterface(object):
             return item
 
         # TODO: Lookup if there is a custom wrapper for this class
-        cls = self._parse_class_from_resource(item['resource'])
-        return AnonStackObject(cls, self._rest_client, item)
+        return _wrap_object(self._object_class, self._rest_client, item)
 
     def _wrap_rest_data(self, data):
         """
         Wrap the returned data in an AnonStackObject
 
-        FIXME: This is a shallow wrapping right now but we should wrap anything that has a resource
+        Lists are returned as a LazyObjectList which only wraps an item when it is accessed.
+        Nested resources are wrapped by AnonStackObject when they are first accessed.
         """
         if isinstance(data, dict):
             return self._wrap_rest_data_one(data)
@@ -98,28 +121,27 @@ class AnonStackInterface(object):
         if not isinstance(data, list):
             raise RuntimeError("Result data must be a dict or a list: '%s' was returned" % type(data))
 
-        objs = []
-        for item in data:
-            objs.append(self._wrap_rest_data_one(item))
-        return objs
+        return LazyObjectList(data, self._wrap_rest_data_one)
 
-    def _parse_class_from_resource(self, resource):
+    @staticmethod
+    def _parse_class_from_resource(resource):
         """
         parses the object type from the resource which is either in the form
         /<object>/<resource_id> or /<object>/<resource_id>/
         """
-        parts = resource.split('/')
-        if not parts[-1].rstrip():
-            del parts[-1]
+        name = resource.rstrip().rstrip('/').rsplit('/', 2)[-2]
 
-        cls = parts[-2]
-        cls = cls[0].upper() + cls[1:].lower()
+        cls = _resource_classes.get(name)
+        if cls is None:
+            cls = name[0].upper() + name[1:].lower()
+            _resource_classes[name] = cls
         return cls
 
     def _isrestclass(self, resource, cls):
         return self._parse_class_from_resource(resource) == cls
 
-    def _unwind_result(self, result):
+    @staticmethod
+    def _unwind_result(result):
         """
         Unwinds the result set and returns the result data
 
@@ -127,10 +149,8 @@ class AnonStackInterface(object):
         which were requested and the meta key contains extra information about
         the result set as a whole such as pagination data.
 
-        Return the data
-
-        TODO: If returning a list wrap data in a ResultSet class which
-        has facilities for working with the metadata such as requesting
+        Return the data, see _wrap_result for wrapping lists in a ResultSet
+        which has facilities for working with the metadata such as requesting
         the next page.
         """
         if 'data' not in result:
@@ -139,8 +159,27 @@ class AnonStackInterface(object):
 
         return result['data']
 
+    def _wrap_result(self, result, endpoint, params=None, headers=None, prefetch=False, stream=False, codec=None, timeout=None):
+        """
+        Wrap a single item result in an AnonStackObject and a list result in a lazy ResultSet
+        which pages through the rest of the collection
+        """
+        if isinstance(result, JSONStream):
+            is_list = result.is_list
+        else:
+            is_list = isinstance(self._unwind_result(result), list)
+
+        if is_list:
+            return ResultSet(self, endpoint, result, params=params, headers=headers, prefetch=prefetch, stream=stream, codec=codec,
+                             timeout=timeout)
+
+        return self._wrap_rest_data(self._unwind_result(result))
+
     def _versioned_endpoint(self, endpoint, id=None, action=None):
-        uri = 'v%s/%s' % (self._rest_client.api_version, endpoint)
+        if endpoint == self._endpoint:
+            uri = self._versioned_prefix
+        else:
+            uri = 'v%s/%s' % (self._rest_client.api_version, endpoint)
         if id is not None:
             uri = '%s%s/' % (uri, id)
         if action is not None:
@@ -152,113 +191,272 @@ class AnonStackInterface(object):
         """
         For any attr that starts with a capital letter create a AnonStackInterface
 
-        __getattr__ will only trigger if the attr is not defined on the class
+        __getattr__ will only trigger if the attr is not defined on the class so the interface
+        is stored on the instance and later lookups are plain attribute accesses
         """
         if attr[0].isupper():
             # create an interface with the attr as the class for the endpoint
-            return AnonStackInterface(attr, self._rest_client, self._endpoint)
+            interface = self._interface_class(attr, self._rest_client, self._endpoint)
+            self.__dict__[attr] = interface
+            return interface
         else:
             raise AttributeError
 
-    def GET(self, id=None, params=None, action=None, headers=None):
+    def GET(self, id=None, params=None, action=None, headers=None, prefetch=False, stream=False, codec=None, timeout=None):
         """ Call GET on the endpoint
 
+            Lists are returned as a ResultSet which lazily requests further pages as it is iterated
+
             :param id: if this is specified tack on an id to the end of the URL for requesting a specific resource
             :param params: if a dictionary is sent in add the items as part of the URL's query string
             :param action: if specified call an action on a specified resource (adds the action at the end of the url)
+            :param prefetch: if True request the next page of a list in the background while the current one is consumed
+            :param stream: if True decode list items as they are read from the socket instead of decoding whole pages,
+                the ResultSet then holds a single item at a time
+            :param codec: json codec (anything with loads and dumps, e.g. ujson) to use instead of the client's
+            :param timeout: seconds to wait for each page, or a (connect, read) tuple, instead of the client's
         """
         endpoint = None
         endpoint = self._versioned_endpoint(self._endpoint, id, action)
 
-        rest_result = self._rest_client.get(endpoint, params=params, headers=headers)
+        rest_result = self._rest_client.get(endpoint, params=params, headers=headers, stream=stream, codec=codec, timeout=timeout)
 
-        return self._wrap_rest_data(self._unwind_result(rest_result))
+        return self._wrap_result(rest_result, endpoint, params=params, headers=headers, prefetch=prefetch, stream=stream, codec=codec,
+                                 timeout=timeout)
 
-    def POST(self, data=None, headers=None, action=None):
+    def POST(self, data=None, headers=None, action=None, stream=False, codec=None, timeout=None):
         """
         Call POST on the endpoint
 
         This is mainly for queries with json payloads.  For creation actions
         use the create method on the AnonStackObject class
+
+        :param stream: if True and the result is a list return an iterator which decodes
+            the items as they are read from the socket
+        :param codec: json codec to use instead of the client's
+        :param timeout: seconds to wait for the API, or a (connect, read) tuple, instead of the client's
         """
         endpoint = self._versioned_endpoint(self._endpoint, action=action)
 
-        resp = self._rest_client.post(endpoint, data=data, headers=headers)
+        resp = self._rest_client.post(endpoint, data=data, headers=headers, stream=stream, codec=codec, timeout=timeout)
 
         result = self._unwind_result(resp)
 
         return result
 
-    def LIST(self, params=None, headers=None):
-        return self.GET(params=params, headers=headers)
+    def LIST(self, params=None, headers=None, prefetch=False, stream=False, codec=None, timeout=None):
+        return self.GET(params=params, headers=headers, prefetch=prefetch, stream=stream, codec=codec, timeout=timeout)
 
 
 class AnonStackObject(AnonStackInterface, dict):
-    def __init__(self, rest_class, client, data):
+    def __init__(self, rest_class, client, data, loaded=False):
         """
         Objects returned by the API are wrapped by this object
 
         This is an AnonStackInterface with added data that can be accessed like an attribute or a dict.
         For instance you can access the name field as such foo.name or foo['name'].  However if the data
         clashes with a defined function you need to use the dictionary access method.
+
+        :param loaded: True if data is what the server returned, changes are then tracked from it.
+            Objects built locally are sent whole by UPDATE.
         """
         if not isinstance(data, dict):
             raise TypeError('Object must be a dictionary')
 
         # copy all items in dict
-        for key, value in data.iteritems():
-            self[key] = value
+        dict.update(self, data)
 
         super(AnonStackObject, self).__init__(rest_class, client)
 
+        # keys whose values were already checked for nested resources
+        self.__dict__['_expanded'] = None
+        # values as last seen from the server for keys which may have changed since
+        self.__dict__['_original'] = None
+        self.__dict__['_loaded'] = loaded
+
     def __getattr__(self, attr):
         if not attr in self:
             raise AttributeError
 
         return self[attr]
 
+    def __getitem__(self, key):
+        """
+        Nested resources (dicts with a resource key, alone or in a list) are wrapped in
+        AnonStackObjects the first time they are accessed
+        """
+        value = dict.__getitem__(self, key)
+        if isinstance(value, (dict, list)) and not isinstance(value, AnonStackObject):
+            expanded = self._expanded
+            if expanded is None or key not in expanded:
+                # the container is about to be handed out and may be changed in place, a
+                # digest of it is enough to tell and costs no copy
+                self._remember(key, _Fingerprint(value))
+                value = self._expand(key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        expanded = self._expanded
+        if expanded is not None:
+            expanded.discard(key)
+        self._remember(key, dict.get(self, key, _MISSING))
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._remember(key, dict.get(self, key, _MISSING))
+        dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *default):
+        self._remember(key, dict.get(self, key, _MISSING))
+        return dict.pop(self, key, *default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def _remember(self, key, value):
+        original = self._original
+        if original is None:
+            original = self.__dict__['_original'] = {}
+        if key not in original:
+            original[key] = value
+
+    def changed_fields(self):
+        """
+        The keys changed since the object was last loaded from or saved to the server
+
+        Assignments, deletions and in place changes to list or dict values are all
+        detected, a key set back to its original value does not count as changed.  In place
+        changes are found by comparing with a digest taken when the value was first read,
+        so tracking never keeps a second copy of it.
+        """
+        original = self._original
+        if not original:
+            return set()
+
+        return set(key for key, value in original.items() if value != dict.get(self, key, _MISSING))
+
+    def _expand(self, key, value):
+        if isinstance(value, dict):
+            if 'resource' in value:
+                value = self._wrap_rest_data_one(value)
+                dict.__setitem__(self, key, value)
+                return value
+        else:
+            for index, item in enumerate(value):
+                if isinstance(item, dict) and 'resource' in item and not isinstance(item, AnonStackObject):
+                    value[index] = self._wrap_rest_data_one(item)
+
+        if self._expanded is None:
+            self.__dict__['_expanded'] = set()
+        self._expanded.add(key)
+        return value
+
+    def _refresh(self, data, keep_changes=False):
+        """
+        merge newly fetched data for the same resource in place, the result is the new clean state
+
+        :param keep_changes: put changes not saved yet back on top of data, they still count as changed
+        """
+        changes = None
+        if keep_changes:
+            changes = dict((key, dict.get(self, key, _MISSING)) for key in self.changed_fields())
+
+        dict.update(self, data)
+        self.__dict__['_expanded'] = None
+        self.__dict__['_original'] = None
+        self.__dict__['_loaded'] = True
+
+        for key, value in (changes or {}).items():
+            # the server's value is what the change is now measured against
+            self._remember(key, dict.get(self, key, _MISSING))
+            if value is _MISSING:
+                dict.pop(self, key, None)
+            else:
+                dict.__setitem__(self, key, value)
+
     def __setattr__(self, attr, value):
-        if not attr.startswith('_'):
+        if attr.startswith('_'):
+            super(AnonStackObject, self).__setattr__(attr, value)
+        else:
+            # only kept in the dict, a copy in __dict__ would hide later in place updates
             self[attr] = value
 
-        super(AnonStackObject, self).__setattr__(attr, value)
-
     def __repr__(self):
         return '%s(%s)' % (self._rest_class, dict.__repr__(self))
 
-    def CREATE(self, headers=None):
+    def CREATE(self, headers=None, timeout=None):
         """ create an object record on the server """
         resource = self.get('resource', None)
         if resource:
             raise ValueError('Can not create, this resource already exists.')
 
         endpoint = self._versioned_endpoint(self._endpoint)
-        resp = self._rest_client.post(endpoint, data=self, headers=headers)
+        resp = self._rest_client.post(endpoint, data=self, headers=headers, timeout=timeout)
 
-        data = self._unwind_result(resp)
+        self._merge_result(self._unwind_result(resp))
 
-        # merge response in
-        for key, value in data.iteritems():
-            self[key] = value
+        identity_map = self._rest_client.identity_map
+        if identity_map is not None and 'resource' in self:
+            identity_map.add(self)
 
         return self
 
-    def UPDATE(self, headers=None):
-        """ update an object record on the server """
+    def UPDATE(self, headers=None, full=False, timeout=None):
+        """
+        update an object record on the server
+
+        Only the fields returned by changed_fields() are sent and no call is made at all
+        when nothing changed.  An object which was not loaded from the server, e.g. one
+        built with api.Groups({'resource': ...}), is always sent whole.
+
+        :param full: send the whole object, needed to remove fields on the server
+        :param timeout: seconds to wait for the API, or a (connect, read) tuple, instead of the client's
+        """
         resource = self.get('resource', None)
         if not resource:
             raise ValueError('Must have a resource to update.')
 
-        resp = self._rest_client.put(resource, data=self, headers=headers)
+        data = self._update_payload(full)
+        if data is None:
+            return self
 
-        data = self._unwind_result(resp)
+        resp = self._rest_client.put(resource, data=data, headers=headers, timeout=timeout)
 
-        # merge response in
-        for key, value in data.iteritems():
-            self[key] = value
+        self._merge_result(self._unwind_result(resp))
 
         return self
 
+    def _update_payload(self, full=False):
+        """ the data UPDATE should send, or None if there is nothing to send """
+        if full or not self._loaded:
+            # nothing is known about what the server holds for an object built locally
+            return self
+
+        changed = self.changed_fields()
+        if not changed:
+            return None
+
+        if any(key not in self for key in changed):
+            # a partial payload can not express a removed field
+            return self
+
+        return dict((key, dict.__getitem__(self, key)) for key in changed)
+
+    def _merge_result(self, data):
+        """ merge the data returned by the server into this object """
+        self._refresh(data)
+
     def _get_endpoint(self, action=None):
         endpoint = self.get('resource')
         if not endpoint:
@@ -270,54 +468,132 @@ class AnonStackObject(AnonStackInterface, dict):
 
         return endpoint
 
-    def PUT(self, data=None, action=None, headers=None):
+    def PUT(self, data=None, action=None, headers=None, timeout=None):
         endpoint = self._get_endpoint(action)
-        resp = self._rest_client.put(endpoint, data=data, headers=headers)
+        resp = self._rest_client.put(endpoint, data=data, headers=headers, timeout=timeout)
 
-        print resp
         result = self._unwind_result(resp)
 
         return result
 
-    def GET(self, params=None, action=None, headers=None):
+    def GET(self, params=None, action=None, headers=None, timeout=None):
         endpoint = self._get_endpoint(action)
-        resp = self._rest_client.get(endpoint, params=params, headers=headers)
+        resp = self._rest_client.get(endpoint, params=params, headers=headers, timeout=timeout)
 
         result = self._unwind_result(resp)
 
         return result
 
-    def DELETE(self, headers=None):
+    def DELETE(self, headers=None, timeout=None):
         """ delete the object record on the server """
         resource = self.get('resource')
         if resource is None:
             raise ValueError('Can not delete, this is not a resource from the server.')
 
-        resp = self._rest_client.delete(resource, headers=headers)
-
-        data = self._unwind_result(resp)
+        resp = self._rest_client.delete(resource, headers=headers, timeout=timeout)
 
-        # merge response in
-        for key, value in data.iteritems():
-            self[key] = value
+        self._merge_result(self._unwind_result(resp))
 
         return self
 
 
+_MISSING = object()
+
+
+def _digest(value):
+    """ digest of a JSON value's content, None if it can not be encoded """
+    try:
+        return hashlib.sha1(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')).digest()
+    except (TypeError, ValueError):
+        return None
+
+
+class _Fingerprint(object):
+    """ stands in for the original of a dict or list value, equal to any value with the same content """
+    __slots__ = ('digest',)
+
+    def __init__(self, value):
+        self.digest = _digest(value)
+
+    def __eq__(self, other):
+        return self.digest is not None and _digest(other) == self.digest
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+def _wrap_object(object_class, client, item):
+    """ Wrap item, which has a resource key, reusing the live object for it if the client has an identity map """
+    cls = AnonStackInterface._parse_class_from_resource(item['resource'])
+    identity_map = client.identity_map
+    if identity_map is None:
+        return object_class(cls, client, item, loaded=True)
+
+    return identity_map.wrap(item, lambda data: object_class(cls, client, data, loaded=True))
+
+
+# the classes used when chaining attributes and wrapping results, subclasses
+# (such as the asyncio interface) point these at their own implementations
+AnonStackInterface._interface_class = AnonStackInterface
+AnonStackInterface._object_class = AnonStackObject
+
+
 class StackApi(object):
     API_VERSION = '0.2'
 
-    def __init__(self, entrypoint_uri='https://api.stackdriver.com/', version=API_VERSION, apikey=None, use_custom_headers=False, transport_controller=None, transport_userdata=None):
+    _interface_class = AnonStackInterface
+
+    def __init__(self, entrypoint_uri='https://api.stackdriver.com/', version=API_VERSION, apikey=None, use_custom_headers=False, transport_controller=None, transport_userdata=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False, keep_alive=True, cache=None, json_codec=None,
+                 retry_policy=None, rate_limiter=None, coalesce=False, instrumentation=None, identity_map=False,
+                 compression=None, key_pool=None, timeout=None, hedge_policy=None, circuit_breaker=None):
         """
         Entry point for the Stackdriver API
 
+        Every call made through this instance reuses the same keep-alive connection pool.
+        Use it as a context manager, or call close(), to release the connections:
+
+            with StackApi(apikey='yourapikey') as api:
+                print api.Groups.LIST()
+
         :param entrypoint_uri: The url you wish to talk to
         :param version: The API version you wish to talk to
         :param apikey: The auth key used to talk to the API
             You can generate keys at https://app.stackdriver.com/settings/apikeys
-            This must be set unless use_custom_headers or transport_controller is set
+            This must be set unless use_custom_headers, transport_controller or key_pool is set
         :param use_custom_headers: If True the apikey does not have to be set and we assume
             you will be setting the key in the headers of each call
+        :param pool_connections: number of per-host connection pools to cache
+        :param pool_maxsize: maximum number of connections kept open per host, raise this
+            when making many concurrent calls from threads
+        :param pool_block: if True block when all pooled connections are busy instead of
+            opening extra, non-pooled connections
+        :param keep_alive: if False close the connection after every call
+        :param cache: a stackdriver.cache.ResponseCache to answer repeated GETs from, e.g.
+            ResponseCache(max_entries=512, ttl=30, endpoint_ttls={'users/': 300})
+        :param json_codec: module or object with loads and dumps functions to use instead of
+            the json module, e.g. ujson
+        :param retry_policy: a stackdriver.retry.RetryPolicy, e.g. RetryPolicy(max_retries=5),
+            to retry throttled and failed calls with jittered exponential backoff
+        :param rate_limiter: a stackdriver.throttle.TokenBucket, e.g. TokenBucket(rate=10),
+            limiting the call rate across threads, share it between clients using one quota
+        :param coalesce: if True concurrent identical GETs share a single call to the server
+        :param instrumentation: a stackdriver.instrumentation.Instrumentation to hook into every
+            network call and collect per endpoint latency histograms and byte counts, see stats()
+        :param identity_map: if True every resource is represented by a single object while it is
+            alive, fetching it again (directly or nested in another result) updates that object
+        :param compression: a stackdriver.compression.Compression, e.g. Compression(min_size=4096),
+            to gzip large request bodies and report compression ratios in stats()
+        :param key_pool: a stackdriver.keypool.KeyPool, e.g. KeyPool(['key1', 'key2'], rate=5),
+            spreading calls over several keys and resting keys which get throttled, set a
+            retry_policy too for throttled calls to be retried with another key
+        :param timeout: seconds to wait for the API on each call, or a (connect, read) tuple
+        :param hedge_policy: a stackdriver.hedge.HedgePolicy, e.g. HedgePolicy(percentile=0.95),
+            sending a second copy of GETs slower than most and using the first answer
+        :param circuit_breaker: a stackdriver.circuit.CircuitBreaker making calls fail fast with
+            CircuitOpenError while the API keeps failing
         :param transport_userdata: data sent to the transport_controller
         :param transport_controller: Advanced, if set all network calls will be decorated
             with this function. Use it to add advanced functionality such as key rotation
@@ -350,7 +626,7 @@ class StackApi(object):
                      # If we get here reraise the last Unauthorized exception in the original context
                      raise last_exception[1], None, last_exception[2]
         """
-        if not apikey and not use_custom_headers and not transport_controller:
+        if not apikey and not use_custom_headers and not transport_controller and key_pool is None:
             raise KeyError('apikey must be specified when talking to the Stackdriver API')
 
         # add the version template to the entrypoint
@@ -363,16 +639,127 @@ class StackApi(object):
                                     apikey,
                                     useragent='Stackdriver Python Client %s' % __version__,
                                     transport_controller=transport_controller,
-                                    transport_userdata=transport_userdata)
+                                    transport_userdata=transport_userdata,
+                                    pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize,
+                                    pool_block=pool_block,
+                                    keep_alive=keep_alive,
+                                    cache=cache,
+                                    json_codec=json_codec,
+                                    retry_policy=retry_policy,
+                                    rate_limiter=rate_limiter,
+                                    coalesce=coalesce,
+                                    instrumentation=instrumentation,
+                                    identity_map=IdentityMap() if identity_map else None,
+                                    compression=compression,
+                                    key_pool=key_pool,
+                                    timeout=timeout,
+                                    hedge_policy=hedge_policy,
+                                    circuit_breaker=circuit_breaker)
+
+    def close(self):
+        """ Close the pooled connections to the API """
+        self._rest_client.close()
+
+    def stats(self):
+        """ Metrics collected by the instrumentation, cache, request coalescing, compression and key pool if enabled """
+        return self._rest_client.stats()
+
+    def _wrap_resource_data(self, data):
+        """ Wrap data fetched directly from a resource path """
+        if isinstance(data, list):
+            return [self._wrap_resource_data(item) for item in data]
+
+        if not isinstance(data, dict) or 'resource' not in data:
+            return data
+
+        return _wrap_object(self._interface_class._object_class, self._rest_client, data)
+
+    def _fetch_one(self, item, headers=None):
+        if isinstance(item, AnonStackObject):
+            endpoint = item._get_endpoint()
+        else:
+            endpoint = item
+
+        resp = self._rest_client.get(endpoint, headers=headers)
+        return self._wrap_resource_data(AnonStackInterface._unwind_result(resp))
+
+    def fetch_many(self, objects_or_resource_paths, concurrency=DEFAULT_CONCURRENCY, stream=False, headers=None):
+        """
+        GET many resources concurrently, for example to rehydrate the partial objects returned
+        by a list call:
+
+            resources = api.Alerting.Maintenance.Resources.GET()
+            for result in api.fetch_many(resources):
+                if result.ok:
+                    print result.result
+                else:
+                    print 'failed', result.item, result.error
+
+        Calls are spread over a thread pool and share the client's connection pool, so make
+        pool_maxsize at least as large as concurrency to keep every connection alive.
+
+        :param objects_or_resource_paths: AnonStackObjects or resource paths (e.g. /v0.2/groups/67/)
+        :param concurrency: maximum number of requests in flight at once
+        :param stream: if True return an iterator of results in completion order instead of
+            a list in input order
+        :return: BulkResults, each holding the item, the fetched object and any exception raised
+        """
+        def fetch(item):
+            return self._fetch_one(item, headers=headers)
+
+        return run_bulk(fetch, objects_or_resource_paths, concurrency=concurrency, stream=stream)
+
+    def _run_many(self, action, objects, concurrency, stream, headers):
+        def call(obj):
+            return getattr(obj, action)(headers=headers)
+
+        return run_bulk(call, objects, concurrency=concurrency, stream=stream)
+
+    def create_many(self, objects, concurrency=DEFAULT_CONCURRENCY, stream=False, headers=None):
+        """
+        CREATE many objects concurrently:
+
+            groups = [api.Groups({'name': 'web-%d' % i, 'conjunction': 'And', 'conditions': []}) for i in range(100)]
+            failed = [result for result in api.create_many(groups) if not result.ok]
+
+        Calls share the client's connection pool, retry policy and rate limiter.  An error
+        such as an HTTPError is recorded on the item it belongs to and the other calls go on.
+
+        :param objects: AnonStackObjects without a resource
+        :param concurrency: maximum number of requests in flight at once
+        :param stream: if True return an iterator of results in completion order instead of
+            a list in input order
+        :return: BulkResults, each holding the object (updated with the server's answer on
+            success) and any exception raised
+        """
+        return self._run_many('CREATE', objects, concurrency, stream, headers)
+
+    def update_many(self, objects, concurrency=DEFAULT_CONCURRENCY, stream=False, headers=None):
+        """ UPDATE many objects concurrently, see create_many """
+        return self._run_many('UPDATE', objects, concurrency, stream, headers)
+
+    def delete_many(self, objects, concurrency=DEFAULT_CONCURRENCY, stream=False, headers=None):
+        """ DELETE many objects concurrently, see create_many """
+        return self._run_many('DELETE', objects, concurrency, stream, headers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def __getattr__(self, attr):
         """
         For any attr that starts with a capital letter create a AnonStackInterface
 
-        __getattr__ will only trigger if the attr is not defined on the class
+        __getattr__ will only trigger if the attr is not defined on the class so the interface
+        is stored on the instance and later lookups are plain attribute accesses
         """
         if attr[0].isupper():
             # create an interface with the attr as the class for the endpoint
-            return AnonStackInterface(attr, self._rest_client)
+            interface = self._interface_class(attr, self._rest_client)
+            self.__dict__[attr] = interface
+            return interface
         else:
             raise AttributeError
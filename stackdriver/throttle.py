@@ -0,0 +1,107 @@
+"""
+throttle - client side rate limiting shared between threads
+
+Stackdriver Public API, Copyright Stackdriver 2014
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket(object):
+    def __init__(self, rate, capacity=None):
+        """
+        Token bucket limiting the rate of calls across every thread that shares it
+
+        Tokens are added at rate per second up to capacity, each call takes one and waits
+        when the bucket is empty.  Pass the same bucket to every client that draws on the
+        same quota.
+
+        :param rate: sustained number of calls per second
+        :param capacity: largest burst allowed, defaults to rate (one second worth of calls)
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+
+        self._rate = float(rate)
+        self._capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self._capacity
+        self._updated = time.time()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+            self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """ Take tokens without waiting, returns the number of seconds to wait if there are not enough """
+        with self._lock:
+            now = time.time()
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+
+            return (tokens - self._tokens) / self._rate
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Take tokens, waiting until they are available
+
+        :param timeout: give up after this many seconds
+        :return: True if the tokens were taken, False on timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for seconds, used when the server says we are throttled
+        so every thread backs off together instead of retrying in a herd
+        """
+        with self._lock:
+            now = time.time()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0
+            self._updated = max(self._updated, self._paused_until)
@@ -0,0 +1,46 @@
+"""
+tests - behaviour tests run against the local stand-in API in benchmarks/fakeserver.py
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fakeserver import FakeApiServer, make_resource
+
+from stackdriver.stackapi import StackApi
+
+APIKEY = 'test-apikey'
+
+
+class ServerTestCase(unittest.TestCase):
+    """ starts one fake server per test class, its scripts and request log are reset before each test """
+
+    server_options = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeApiServer(items=20, per_page=10, **cls.server_options).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.reset()
+
+    def api(self, **kwargs):
+        """ a StackApi talking to the fake server, closed when the test ends """
+        if 'key_pool' not in kwargs:
+            kwargs.setdefault('apikey', APIKEY)
+        api = StackApi(self.server.url, **kwargs)
+        self.addCleanup(api.close)
+        return api
+
+    @staticmethod
+    def resource(collection, id):
+        return make_resource(collection, StackApi.API_VERSION, id)
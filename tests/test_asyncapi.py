@@ -0,0 +1,101 @@
+import asyncio
+import time
+import unittest
+
+import requests
+
+from . import APIKEY, ServerTestCase
+
+try:
+    import aiohttp
+    from stackdriver.asyncapi import AsyncStackApi
+except (ImportError, SyntaxError):
+    aiohttp = None
+
+GROUP = '/v0.2/groups/1/'
+GROUPS = '/v0.2/groups/'
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class AsyncApiTest(ServerTestCase):
+    def _run(self, func, **kwargs):
+        async def main():
+            async with AsyncStackApi(self.server.url, apikey=APIKEY, **kwargs) as api:
+                return await func(api)
+
+        return asyncio.run(main())
+
+    def test_get(self):
+        group = self._run(lambda api: api.Groups.GET(id=1))
+
+        self.assertEqual(group, self.resource('groups', 1))
+        self.assertEqual(self.server.requests_to('GET', GROUP)[0].headers['x-stackdriver-apikey'], APIKEY)
+
+    def test_list_fetches_every_page(self):
+        groups = self._run(lambda api: api.Groups.LIST(params={'per_page': 7}))
+
+        self.assertEqual([group.id for group in groups], list(range(20)))
+        self.assertEqual(sorted(call.query.get('page', '1') for call in self.server.requests_to('GET', GROUPS)),
+                         ['1', '2', '3'])
+
+    def test_list_follows_next_links(self):
+        self.server.script('GET', GROUPS, {'data': [self.resource('groups', 100)],
+                                           'meta': {'next': self.server.url + 'v0.2/groups/?page=2'}})
+
+        groups = self._run(lambda api: api.Groups.LIST())
+
+        self.assertEqual([group.id for group in groups], [100] + list(range(10, 20)))
+
+    def test_create_update_delete(self):
+        async def lifecycle(api):
+            group = api.Groups({'name': 'web', 'conjunction': 'And'})
+            await group.CREATE()
+            created = dict(group)
+            group.name = 'db'
+            await group.UPDATE()
+            await group.DELETE()
+            return group, created
+
+        group, created = self._run(lifecycle)
+
+        self.assertEqual(created['resource'], '%s%d/' % (GROUPS, created['id']))
+        self.assertEqual(self.server.requests_to('PUT', created['resource'])[0].body, {'name': 'db'})
+        self.assertEqual(group.name, 'db')
+        self.assertIn('deleted_epoch', group)
+
+    def test_http_errors_are_requests_errors(self):
+        self.server.script('GET', GROUP, {'status': 404})
+
+        with self.assertRaises(requests.HTTPError) as raised:
+            self._run(lambda api: api.Groups.GET(id=1))
+
+        self.assertEqual(raised.exception.response.status_code, 404)
+
+    def test_timeout_is_a_requests_timeout(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 0.5})
+
+        self.assertRaises(requests.exceptions.Timeout, self._run, lambda api: api.Groups.GET(id=1), timeout=0.1)
+
+    def test_concurrency_is_bounded(self):
+        for id in range(6):
+            self.server.script('GET', '%s%d/' % (GROUPS, id), {'data': self.resource('groups', id), 'delay': 0.2})
+
+        async def fetch(api):
+            start = time.time()
+            groups = await asyncio.gather(*[api.Groups.GET(id=id) for id in range(6)])
+            return groups, time.time() - start
+
+        groups, elapsed = self._run(fetch, concurrency=3)
+
+        self.assertEqual([group.id for group in groups], list(range(6)))
+        self.assertGreaterEqual(elapsed, 0.4)
+
+    def test_requires_async_with(self):
+        api = AsyncStackApi(self.server.url, apikey=APIKEY)
+
+        with self.assertRaises(TypeError):
+            with api:
+                pass
+
+    def test_requires_an_apikey(self):
+        self.assertRaises(KeyError, AsyncStackApi, self.server.url)
@@ -0,0 +1,90 @@
+import threading
+import time
+import unittest
+
+import requests
+
+from stackdriver.bulk import run_bulk
+
+from . import ServerTestCase
+
+
+class RunBulkTest(unittest.TestCase):
+    def test_results_in_input_order(self):
+        results = run_bulk(lambda item: item * 2, range(10), concurrency=4)
+
+        self.assertEqual([result.result for result in results], [item * 2 for item in range(10)])
+        self.assertEqual([result.index for result in results], list(range(10)))
+
+    def test_failures_are_per_item(self):
+        def func(item):
+            if item % 3 == 0:
+                raise ValueError(item)
+            return item
+
+        results = run_bulk(func, range(6))
+
+        self.assertEqual([result.ok for result in results], [False, True, True, False, True, True])
+        self.assertIsInstance(results[3].error, ValueError)
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def func(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        run_bulk(func, range(20), concurrency=3)
+
+        self.assertEqual(running[1], 3)
+
+    def test_stream(self):
+        results = run_bulk(lambda item: item, range(5), stream=True)
+
+        self.assertEqual(sorted(result.result for result in results), list(range(5)))
+
+    def test_stream_starts_no_threads_until_iterated(self):
+        threads = threading.active_count()
+
+        results = run_bulk(lambda item: item, range(5), concurrency=4, stream=True)
+
+        self.assertEqual(threading.active_count(), threads)
+        self.assertEqual(len(list(results)), 5)
+
+    def test_no_items(self):
+        self.assertEqual(run_bulk(lambda item: item, []), [])
+        self.assertEqual(list(run_bulk(lambda item: item, [], stream=True)), [])
+
+
+class FetchManyTest(ServerTestCase):
+    def test_rehydrates_objects_and_paths(self):
+        api = self.api()
+        stubs = [api.Groups({'resource': '/v0.2/groups/%d/' % id}) for id in range(3)]
+
+        results = api.fetch_many(stubs + ['/v0.2/groups/7/'], concurrency=2)
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([result.result['name'] for result in results], ['web-0', 'web-1', 'web-2', 'web-7'])
+        self.assertEqual(len(self.server.request_log), 4)
+
+    def test_failure_is_reported_on_its_item(self):
+        self.server.script('GET', '/v0.2/groups/1/', {'status': 404})
+        api = self.api()
+
+        results = api.fetch_many(['/v0.2/groups/0/', '/v0.2/groups/1/', '/v0.2/groups/2/'])
+
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertEqual(results[1].error.response.status_code, 404)
+        self.assertIsInstance(results[1].error, requests.HTTPError)
+
+    def test_stream(self):
+        api = self.api()
+
+        results = list(api.fetch_many(['/v0.2/groups/%d/' % id for id in range(5)], stream=True))
+
+        self.assertEqual(sorted(result.result['id'] for result in results), list(range(5)))
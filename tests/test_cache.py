@@ -0,0 +1,70 @@
+import time
+
+from stackdriver.cache import ResponseCache
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+
+
+class CacheTest(ServerTestCase):
+    server_options = {'etags': True}
+
+    def test_fresh_entry_is_served_locally(self):
+        cache = ResponseCache(ttl=60)
+        api = self.api(cache=cache)
+
+        first = api.Groups.GET(id=1)
+        second = api.Groups.GET(id=1)
+
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_stale_entry_is_revalidated(self):
+        cache = ResponseCache(ttl=0.05)
+        api = self.api(cache=cache)
+
+        first = api.Groups.GET(id=1)
+        time.sleep(0.1)
+        second = api.Groups.GET(id=1)
+
+        self.assertEqual(first, second)
+        calls = self.server.requests_to('GET', GROUP)
+        self.assertEqual(len(calls), 2)
+        self.assertNotIn('if-none-match', calls[0].headers)
+        self.assertIn('if-none-match', calls[1].headers)
+        self.assertEqual(cache.revalidations, 1)
+
+    def test_writes_invalidate(self):
+        cache = ResponseCache(ttl=60)
+        api = self.api(cache=cache)
+
+        group = api.Groups.GET(id=1)
+        api.Groups.LIST()
+        group.name = 'renamed'
+        group.UPDATE()
+        api.Groups.GET(id=1)
+        api.Groups.LIST()
+
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 2)
+        self.assertEqual(len(self.server.requests_to('GET', '/v0.2/groups/')), 2)
+        self.assertEqual(cache.invalidations, 2)
+
+    def test_zero_ttl_endpoint_is_not_cached(self):
+        api = self.api(cache=ResponseCache(ttl=60, endpoint_ttls={'groups/': 0}))
+
+        api.Groups.GET(id=1)
+        api.Groups.GET(id=1)
+
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 2)
+
+    def test_list_params(self):
+        api = self.api(cache=ResponseCache(ttl=60))
+
+        api.Groups.GET(params={'id': [1, 2]})
+        api.Groups.GET(params={'id': [1, 2]})
+        api.Groups.GET(params={'id': [2, 1]})
+
+        self.assertEqual(len(self.server.requests_to('GET', '/v0.2/groups/')), 2)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import requests
+
+from stackdriver.circuit import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from stackdriver.hedge import HedgePolicy
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+
+
+class CircuitBreakerTest(ServerTestCase):
+    def _fail(self, api, times):
+        for _ in range(times):
+            with self.assertRaises(requests.HTTPError):
+                api.Groups.GET(id=1)
+
+    def test_opens_after_consecutive_failures(self):
+        self.server.script('GET', GROUP, {'status': 503}, {'status': 503})
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        api = self.api(circuit_breaker=breaker)
+
+        self._fail(api, 1)
+        self.assertEqual(breaker.state, CLOSED)
+        self._fail(api, 1)
+        self.assertEqual(breaker.state, OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            api.Groups.GET(id=1)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 2)
+        self.assertEqual(breaker.stats()['rejected'], 1)
+
+    def test_success_resets_the_count(self):
+        self.server.script('GET', GROUP, {'status': 503}, {'data': self.resource('groups', 1)}, {'status': 503})
+        breaker = CircuitBreaker(failure_threshold=2)
+        api = self.api(circuit_breaker=breaker)
+
+        self._fail(api, 1)
+        api.Groups.GET(id=1)
+        self._fail(api, 1)
+
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_client_errors_are_not_failures(self):
+        self.server.script('GET', GROUP, {'status': 404}, {'status': 404})
+        breaker = CircuitBreaker(failure_threshold=1)
+        api = self.api(circuit_breaker=breaker)
+
+        self._fail(api, 2)
+
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_trial_call_closes_or_reopens(self):
+        self.server.script('GET', GROUP, {'status': 503}, {'status': 503})
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.1)
+        transitions = []
+        breaker.on_state_change(lambda old, new: transitions.append((old, new)))
+        api = self.api(circuit_breaker=breaker)
+
+        self._fail(api, 1)
+        time.sleep(0.15)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self._fail(api, 1)
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.15)
+        api.Groups.GET(id=1)
+
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(transitions, [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN),
+                                       (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)])
+
+
+class HedgeTest(ServerTestCase):
+    def test_slow_get_is_hedged(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 1})
+        hedge = HedgePolicy(initial_delay=0.05)
+        api = self.api(hedge_policy=hedge)
+
+        start = time.time()
+        group = api.Groups.GET(id=1)
+
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(group['id'], 1)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 2)
+        self.assertEqual(hedge.stats()['hedged'], 1)
+        self.assertEqual(hedge.stats()['hedge_won'], 1)
+
+    def test_fast_get_is_not_hedged(self):
+        hedge = HedgePolicy(initial_delay=1)
+        api = self.api(hedge_policy=hedge)
+
+        api.Groups.GET(id=1)
+
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 1)
+        self.assertEqual(hedge.stats()['hedged'], 0)
+
+    def test_worker_threads_are_reused(self):
+        hedge = HedgePolicy(initial_delay=1)
+        api = self.api(hedge_policy=hedge)
+
+        api.Groups.GET(id=1)
+        threads = threading.active_count()
+        for _ in range(20):
+            api.Groups.GET(id=1)
+
+        self.assertEqual(threading.active_count(), threads)
+        self.assertEqual(hedge.stats()['calls'], 21)
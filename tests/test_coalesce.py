@@ -0,0 +1,74 @@
+import threading
+
+import requests
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+CALLERS = 5
+
+
+class CoalesceTest(ServerTestCase):
+    def _get_concurrently(self, api):
+        results = [None] * CALLERS
+        errors = [None] * CALLERS
+
+        def get(index):
+            try:
+                results[index] = api.Groups.GET(id=1)
+            except Exception as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=get, args=(index,)) for index in range(CALLERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_gets_share_one_call(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 0.3})
+        api = self.api(coalesce=True)
+
+        results, errors = self._get_concurrently(api)
+
+        self.assertEqual(errors, [None] * CALLERS)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 1)
+        self.assertEqual(api.stats()['coalesce'], {'calls': 1, 'coalesced': CALLERS - 1})
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_callers_get_their_own_copy(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 0.3})
+        api = self.api(coalesce=True)
+
+        results, errors = self._get_concurrently(api)
+        results[0].tags['role'] = 'db'
+
+        self.assertEqual(len(set(id(result) for result in results)), CALLERS)
+        self.assertTrue(all(result.tags['role'] == 'web' for result in results[1:]))
+
+    def test_error_reaches_every_caller(self):
+        self.server.script('GET', GROUP, {'status': 500, 'delay': 0.3})
+        api = self.api(coalesce=True)
+
+        results, errors = self._get_concurrently(api)
+
+        self.assertEqual(results, [None] * CALLERS)
+        self.assertTrue(all(isinstance(error, requests.HTTPError) for error in errors))
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 1)
+
+    def test_later_gets_call_again(self):
+        api = self.api(coalesce=True)
+
+        api.Groups.GET(id=1)
+        api.Groups.GET(id=1)
+
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 2)
+
+    def test_list_params(self):
+        api = self.api(coalesce=True)
+
+        groups = api.Groups.GET(params={'id': [1, 2]})
+
+        self.assertEqual(len(groups), 20)
+        self.assertEqual(self.server.requests_to('GET', '/v0.2/groups/')[0].query, {'id': '1'})
@@ -0,0 +1,84 @@
+import json
+import unittest
+import zlib
+
+from stackdriver.compression import Compression
+
+from . import ServerTestCase
+
+GROUPS = '/v0.2/groups/'
+
+
+def _group(size):
+    return {'name': 'web', 'conjunction': 'And',
+            'conditions': [{'type': 'name', 'comparison': 'starts_with', 'value': 'web-%d' % i} for i in range(size)]}
+
+
+class CompressionTest(unittest.TestCase):
+    def test_small_bodies_are_left_alone(self):
+        compression = Compression(min_size=100)
+
+        self.assertEqual(compression.compress('{"name": "web"}'), (b'{"name": "web"}', None))
+        self.assertEqual(compression.compress(None), (None, None))
+        self.assertEqual(compression.stats()['requests_compressed'], 0)
+
+    def test_large_bodies_are_compressed(self):
+        body = json.dumps(_group(100)).encode('utf-8')
+
+        for encoding, wbits in (('gzip', 16 + zlib.MAX_WBITS), ('deflate', zlib.MAX_WBITS)):
+            compression = Compression(encoding=encoding, min_size=100)
+            compressed, used = compression.compress(body)
+
+            self.assertEqual(used, encoding)
+            self.assertEqual(zlib.decompress(compressed, wbits), body)
+            stats = compression.stats()
+            self.assertEqual((stats['request_bytes'], stats['request_wire_bytes']), (len(body), len(compressed)))
+            self.assertLess(stats['request_ratio'], 1)
+
+    def test_unknown_encoding(self):
+        self.assertRaises(ValueError, Compression, encoding='br')
+
+
+class CompressedRequestsTest(ServerTestCase):
+    def test_large_bodies_are_sent_compressed(self):
+        compression = Compression(min_size=1024)
+        api = self.api(compression=compression)
+
+        api.Groups(_group(100)).CREATE()
+        api.Groups(_group(1)).CREATE()
+
+        large, small = self.server.requests_to('POST', GROUPS)
+        self.assertEqual(large.headers['content-encoding'], 'gzip')
+        self.assertEqual(large.body, _group(100))
+        self.assertLess(int(large.headers['content-length']), len(json.dumps(_group(100))))
+        self.assertNotIn('content-encoding', small.headers)
+        self.assertEqual(small.body, _group(1))
+        self.assertEqual(api.stats()['compression']['requests_compressed'], 1)
+
+    def test_without_compression_bodies_are_sent_as_is(self):
+        api = self.api()
+
+        api.Groups(_group(100)).CREATE()
+
+        self.assertNotIn('content-encoding', self.server.requests_to('POST', GROUPS)[0].headers)
+        self.assertNotIn('compression', api.stats())
+
+
+class CompressedResponsesTest(ServerTestCase):
+    server_options = {'compress': True}
+
+    def test_responses_are_decompressed_and_counted(self):
+        compression = Compression()
+        api = self.api(compression=compression)
+
+        groups = api.Groups.LIST().all()
+
+        self.assertEqual([group.id for group in groups], list(range(20)))
+        self.assertIn('gzip', self.server.requests_to('GET', GROUPS)[0].headers['accept-encoding'])
+        stats = compression.stats()
+        self.assertEqual((stats['responses'], stats['responses_compressed']), (2, 2))
+        self.assertLess(stats['response_wire_bytes'], stats['response_bytes'])
+        self.assertLess(stats['response_ratio'], 1)
+
+        compression.reset()
+        self.assertEqual(compression.stats()['responses'], 0)
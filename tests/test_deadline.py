@@ -0,0 +1,96 @@
+import threading
+import time
+
+import requests
+
+from stackdriver.circuit import CircuitBreaker, CLOSED
+from stackdriver.deadline import Deadline, DeadlineExceeded
+from stackdriver.retry import RetryPolicy
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+
+
+class DeadlineTest(ServerTestCase):
+    def test_slow_call_is_cut_short(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 1})
+        api = self.api()
+
+        start = time.time()
+        with self.assertRaises(requests.exceptions.Timeout):
+            with Deadline(0.2):
+                api.Groups.GET(id=1)
+
+        self.assertLess(time.time() - start, 0.8)
+
+    def test_expired_deadline_skips_the_network(self):
+        api = self.api()
+
+        with self.assertRaises(DeadlineExceeded):
+            with Deadline(0.05):
+                time.sleep(0.1)
+                api.Groups.GET(id=1)
+
+        self.assertEqual(self.server.requests_to('GET', GROUP), [])
+
+    def test_retry_past_the_deadline_is_not_attempted(self):
+        self.server.script('GET', GROUP, {'status': 503, 'headers': {'Retry-After': '5'}})
+        api = self.api(retry_policy=RetryPolicy())
+
+        start = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            with Deadline(1):
+                api.Groups.GET(id=1)
+
+        self.assertLess(time.time() - start, 0.8)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 1)
+
+    def test_calls_share_the_budget(self):
+        self.server.script('GET', GROUP, *[{'data': self.resource('groups', 1), 'delay': 0.2}] * 3)
+        api = self.api()
+
+        with self.assertRaises(requests.exceptions.Timeout):
+            with Deadline(0.5):
+                for _ in range(3):
+                    api.Groups.GET(id=1)
+
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 3)
+
+    def test_bulk_workers_inherit_the_deadline(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 1})
+        api = self.api()
+
+        start = time.time()
+        with Deadline(0.2):
+            results = api.fetch_many(['/v0.2/groups/1/', '/v0.2/groups/2/'], concurrency=2)
+
+        self.assertLess(time.time() - start, 0.8)
+        self.assertIsInstance(results[0].error, requests.exceptions.Timeout)
+        self.assertTrue(results[1].ok)
+
+    def test_deadline_timeouts_leave_the_breaker_closed(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 1})
+        breaker = CircuitBreaker(failure_threshold=1)
+        api = self.api(circuit_breaker=breaker)
+
+        with self.assertRaises(requests.exceptions.Timeout):
+            with Deadline(0.2):
+                api.Groups.GET(id=1)
+
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_coalesced_caller_keeps_its_own_deadline(self):
+        self.server.script('GET', GROUP, {'data': self.resource('groups', 1), 'delay': 0.5})
+        api = self.api(coalesce=True)
+        leader = threading.Thread(target=api.Groups.GET, kwargs={'id': 1})
+        leader.start()
+        time.sleep(0.05)
+
+        start = time.time()
+        with self.assertRaises(DeadlineExceeded):
+            with Deadline(0.1):
+                api.Groups.GET(id=1)
+
+        self.assertLess(time.time() - start, 0.4)
+        leader.join()
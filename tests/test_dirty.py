@@ -0,0 +1,113 @@
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+
+
+class DirtyTrackingTest(ServerTestCase):
+    def test_loaded_object_is_clean(self):
+        group = self.api().Groups.GET(id=1)
+
+        group.tags
+        group.name = group.name
+
+        self.assertEqual(group.changed_fields(), set())
+
+    def test_changes_are_tracked(self):
+        group = self.api().Groups.GET(id=1)
+
+        group.name = 'renamed'
+        group.tags['role'] = 'db'
+        del group['zone']
+
+        self.assertEqual(group.changed_fields(), set(['name', 'tags', 'zone']))
+
+    def test_update_sends_only_changed_fields(self):
+        group = self.api().Groups.GET(id=1)
+
+        group.name = 'renamed'
+        group.UPDATE()
+
+        calls = self.server.requests_to('PUT', GROUP)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].body, {'name': 'renamed'})
+        self.assertEqual(group.changed_fields(), set())
+
+    def test_update_without_changes_makes_no_call(self):
+        group = self.api().Groups.GET(id=1)
+
+        group.UPDATE()
+
+        self.assertEqual(self.server.requests_to('PUT', GROUP), [])
+
+    def test_removed_field_sends_the_whole_object(self):
+        group = self.api().Groups.GET(id=1)
+
+        del group['zone']
+        group.UPDATE()
+
+        body = self.server.requests_to('PUT', GROUP)[0].body
+        self.assertNotIn('zone', body)
+        self.assertEqual(body['name'], 'web-1')
+
+    def test_full_update(self):
+        group = self.api().Groups.GET(id=1)
+
+        group.UPDATE(full=True)
+
+        self.assertEqual(self.server.requests_to('PUT', GROUP)[0].body['tags'], group.tags)
+
+    def test_object_built_locally_is_sent_whole(self):
+        group = self.api().Groups({'resource': '/v0.2/groups/3/', 'name': 'x'})
+
+        group.UPDATE()
+
+        calls = self.server.requests_to('PUT', '/v0.2/groups/3/')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].body, {'resource': '/v0.2/groups/3/', 'name': 'x'})
+
+    def test_created_object_is_tracked(self):
+        group = self.api().Groups({'name': 'x'}).CREATE()
+
+        group.name = 'y'
+        group.UPDATE()
+
+        self.assertEqual(self.server.requests_to('PUT', group.resource)[0].body, {'name': 'y'})
+
+    def test_refetch_keeps_unsaved_changes(self):
+        api = self.api(identity_map=True)
+        group = api.Groups.GET(id=1)
+
+        group.name = 'local-edit'
+        group.tags['role'] = 'db'
+        del group['zone']
+        list(api.Groups.LIST())
+
+        self.assertEqual(group['name'], 'local-edit')
+        self.assertEqual(group['tags']['role'], 'db')
+        self.assertNotIn('zone', group)
+        self.assertEqual(group.changed_fields(), set(['name', 'tags', 'zone']))
+
+        group.UPDATE()
+
+        self.assertEqual(len(self.server.requests_to('PUT', GROUP)), 1)
+        self.assertEqual(group.changed_fields(), set())
+
+    def test_refetch_updates_unchanged_fields(self):
+        api = self.api(identity_map=True)
+        group = api.Groups.GET(id=1)
+        self.server.script('GET', GROUP, {'data': dict(self.resource('groups', 1), zone='eu-west-1a')})
+
+        group.name = 'local-edit'
+        api.Groups.GET(id=1)
+
+        self.assertEqual(group['zone'], 'eu-west-1a')
+        self.assertEqual(group.changed_fields(), set(['name']))
+
+    def test_in_place_change_undone_is_clean(self):
+        group = self.api().Groups.GET(id=1)
+
+        group.tags['role'] = 'db'
+        self.assertEqual(group.changed_fields(), set(['tags']))
+        group.tags['role'] = 'web'
+
+        self.assertEqual(group.changed_fields(), set())
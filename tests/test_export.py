@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+
+from stackdriver import export
+
+from . import APIKEY, ServerTestCase
+
+GROUPS = '/v0.2/groups/'
+
+
+class ExportTest(ServerTestCase):
+    def setUp(self):
+        super(ExportTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.output = os.path.join(self.directory, 'out')
+
+    def _export(self, *args):
+        argv = list(args) + ['--apikey', APIKEY, '--entrypoint', self.server.url, '--output', self.output]
+        self.assertEqual(export.main(argv), 0)
+        with open(self.output, 'rb') as f:
+            return f.read()
+
+    def _pages_requested(self):
+        return sorted(call.query.get('page', '1') for call in self.server.requests_to('GET', GROUPS))
+
+    def test_ndjson(self):
+        lines = self._export('Groups').decode('utf-8').splitlines()
+
+        self.assertEqual([json.loads(line) for line in lines], [self.resource('groups', id) for id in range(20)])
+
+    def test_csv(self):
+        output = self._export('Groups', '--format', 'csv', '--fields', 'id,name,tags')
+
+        rows = output.split(b'\r\n')
+        self.assertEqual(rows[0], b'id,name,tags')
+        self.assertEqual(rows[1], b'0,web-0,"{""environment"": ""production"", ""role"": ""web""}"')
+        self.assertEqual(len(rows), 22)
+        self.assertEqual(rows[-1], b'')
+
+    def test_csv_columns_default_to_the_first_item(self):
+        output = self._export('Groups', '--format', 'csv')
+
+        self.assertEqual(output.split(b'\r\n')[0], b','.join(sorted(key.encode('ascii') for key in self.resource('groups', 0))))
+
+    def test_parallel(self):
+        lines = self._export('Groups', '--parallel', '3', '--param', 'per_page=4').decode('utf-8').splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines], list(range(20)))
+        self.assertEqual(self._pages_requested(), ['1', '2', '3', '4', '5'])
+        self.assertTrue(all(call.query['per_page'] == '4' for call in self.server.requests_to('GET', GROUPS)))
+
+    def test_nested_collection(self):
+        lines = self._export('Alerting.Maintenance.Resources').decode('utf-8').splitlines()
+
+        self.assertEqual(len(lines), 20)
+        self.assertEqual(len(self.server.requests_to('GET', '/v0.2/alerting/maintenance/resources/')), 2)
+
+    def test_invalid_arguments(self):
+        for argv in (['groups'], ['Groups', '--param', 'per_page'], ['Groups', '--format', 'xml']):
+            with self.assertRaises(SystemExit) as raised:
+                export.main(argv + ['--apikey', APIKEY, '--entrypoint', self.server.url, '--output', self.output])
+            self.assertEqual(raised.exception.code, 2)
+
+        self.assertEqual(self.server.request_log, [])
+        self.assertFalse(os.path.exists(self.output))
+
+    def test_apikey_is_required(self):
+        apikey = os.environ.pop('STACKDRIVER_API_KEY', None)
+        if apikey is not None:
+            self.addCleanup(os.environ.__setitem__, 'STACKDRIVER_API_KEY', apikey)
+
+        with self.assertRaises(SystemExit) as raised:
+            export.main(['Groups', '--entrypoint', self.server.url])
+
+        self.assertEqual(raised.exception.code, 2)
@@ -0,0 +1,139 @@
+import unittest
+
+import requests
+
+from stackdriver.groupgraph import GroupGraph
+
+
+def _not_found():
+    response = requests.models.Response()
+    response.status_code = 404
+    return requests.HTTPError('404 Client Error', response=response)
+
+
+class StubGroup(dict):
+    def __init__(self, api, data):
+        dict.__init__(self, data)
+        self._api = api
+
+    def GET(self, action=None):
+        self._api.calls.append(('members', self['id']))
+        if self['id'] in self._api.broken_members:
+            raise requests.ConnectionError('members of %d' % self['id'])
+        return ['instance-%d-%d' % (self['id'], i) for i in range(2)]
+
+
+class StubGroups(object):
+    def __init__(self, api):
+        self._api = api
+
+    def LIST(self):
+        self._api.calls.append(('list', None))
+        return [StubGroup(self._api, data) for id, data in sorted(self._api.groups.items()) if id not in self._api.unlisted]
+
+    def GET(self, id):
+        self._api.calls.append(('get', id))
+        if id not in self._api.groups:
+            raise _not_found()
+        return StubGroup(self._api, self._api.groups[id])
+
+
+class StubApi(object):
+    """ groups 1 > 2 > (3, 4), 5 and 6 > 9 where 9 is not listed, 5 and 3 share a name """
+
+    def __init__(self):
+        self.groups = {}
+        for id, name, parent_id in ((1, 'Production', None), (2, 'Web', 1), (3, 'Frontend', 2), (4, 'Backend', 2),
+                                    (5, 'Frontend', None), (6, 'Staging', 9), (9, 'Hidden', None)):
+            self.groups[id] = {'id': id, 'name': name, 'parent_id': parent_id}
+        self.unlisted = set([9])
+        self.broken_members = set()
+        self.calls = []
+        self.Groups = StubGroups(self)
+
+    def called(self, kind):
+        return sorted(id for call, id in self.calls if call == kind)
+
+
+class GroupGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.api = StubApi()
+        self.graph = GroupGraph(self.api, concurrency=4).crawl()
+
+    def _ids(self, groups):
+        return [group['id'] for group in groups]
+
+    def test_crawl(self):
+        self.assertEqual(len(self.graph), 7)
+        self.assertEqual(sorted(self._ids(self.graph)), [1, 2, 3, 4, 5, 6, 9])
+        self.assertEqual(self.api.called('get'), [9])
+        self.assertEqual(self.api.called('members'), [1, 2, 3, 4, 5, 6, 9])
+        self.assertEqual(self.graph.members(3), ['instance-3-0', 'instance-3-1'])
+
+    def test_queries(self):
+        self.assertEqual(self._ids(self.graph.ancestors(3)), [2, 1])
+        self.assertEqual(self._ids(self.graph.ancestors(6)), [9])
+        self.assertEqual(self._ids(self.graph.descendants(1))[0], 2)
+        self.assertEqual(sorted(self._ids(self.graph.descendants(1))), [2, 3, 4])
+        self.assertEqual(sorted(self._ids(self.graph.children(2))), [3, 4])
+        self.assertEqual(self.graph.parent(3)['id'], 2)
+        self.assertIsNone(self.graph.parent(1))
+        self.assertEqual(sorted(self._ids(self.graph.roots())), [1, 5, 9])
+        self.assertEqual(sorted(self._ids(self.graph.by_name('Frontend'))), [3, 5])
+        self.assertEqual(self.graph.by_name('Nothing'), [])
+        self.assertIn(9, self.graph)
+        self.assertIsNone(self.graph.get(42))
+
+    def test_refresh_fetches_only_what_changed(self):
+        del self.api.calls[:]
+        self.api.groups[3]['name'] = 'Edge'
+        del self.api.groups[4]
+        self.api.groups[7] = {'id': 7, 'name': 'Cache', 'parent_id': 2}
+
+        changed = self.graph.refresh()
+
+        self.assertEqual(changed, set([3, 4, 7]))
+        self.assertEqual(self.api.called('members'), [3, 7])
+        self.assertEqual(self.api.called('get'), [])
+        self.assertEqual(sorted(self._ids(self.graph.children(2))), [3, 7])
+        self.assertEqual(self._ids(self.graph.by_name('Frontend')), [5])
+        self.assertEqual(self._ids(self.graph.by_name('Edge')), [3])
+        self.assertIsNone(self.graph.members(4))
+
+    def test_refresh_keeps_unlisted_parents_while_referenced(self):
+        self.assertEqual(self.graph.refresh(), set())
+        self.assertIn(9, self.graph)
+
+        del self.api.groups[6]
+        self.assertEqual(self.graph.refresh(), set([6, 9]))
+        self.assertNotIn(9, self.graph)
+
+    def test_refresh_ids(self):
+        del self.api.calls[:]
+        self.api.groups[2]['parent_id'] = 5
+        del self.api.groups[4]
+
+        changed = self.graph.refresh([2, 4])
+
+        self.assertEqual(changed, set([2, 4]))
+        self.assertEqual(self.api.called('get'), [2, 4])
+        self.assertEqual(self.api.called('members'), [2])
+        self.assertEqual(self._ids(self.graph.ancestors(3)), [2, 5])
+        self.assertEqual(self._ids(self.graph.children(2)), [3])
+        self.assertEqual(self.graph.children(1), [])
+
+    def test_member_failures_are_left_out(self):
+        self.api.broken_members.add(3)
+
+        graph = GroupGraph(self.api).crawl()
+
+        self.assertIsNone(graph.members(3))
+        self.assertEqual(graph.members(4), ['instance-4-0', 'instance-4-1'])
+
+    def test_members_can_be_skipped(self):
+        del self.api.calls[:]
+
+        graph = GroupGraph(self.api, members_action=None).crawl()
+
+        self.assertEqual(self.api.called('members'), [])
+        self.assertIsNone(graph.members(1))
@@ -0,0 +1,43 @@
+from stackdriver.stackapi import AnonStackObject
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+
+
+class NestedResourceTest(ServerTestCase):
+    def _script_nested(self):
+        group = self.resource('groups', 1)
+        group['parent'] = self.resource('groups', 0)
+        group['children'] = [self.resource('groups', 10), self.resource('groups', 11)]
+        self.server.script('GET', GROUP, {'data': group}, {'data': group})
+
+    def test_nested_resources_are_wrapped(self):
+        self._script_nested()
+        group = self.api().Groups.GET(id=1)
+
+        self.assertIsInstance(group.parent, AnonStackObject)
+        self.assertEqual(group.parent.GET()['id'], 0)
+        self.assertTrue(all(isinstance(child, AnonStackObject) for child in group.children))
+
+    def test_identity_map_shares_objects(self):
+        self._script_nested()
+        api = self.api(identity_map=True)
+
+        group = api.Groups.GET(id=1)
+        parent = api.Groups.GET(id=0)
+
+        self.assertIs(group.parent, parent)
+        self.assertIs(api.Groups.GET(id=1), group)
+
+    def test_attribute_follows_refresh(self):
+        api = self.api(identity_map=True)
+        group = api.Groups.GET(id=1)
+        group.name = 'local-edit'
+        group.UPDATE()
+
+        api.Groups.GET(id=1)
+
+        self.assertEqual(group['name'], 'web-1')
+        self.assertEqual(group.name, 'web-1')
+        self.assertNotIn('name', group.__dict__)
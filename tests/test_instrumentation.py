@@ -0,0 +1,115 @@
+import unittest
+
+import requests
+
+from stackdriver import instrumentation as events
+from stackdriver.instrumentation import Histogram, Instrumentation, endpoint_name
+from stackdriver.retry import RetryPolicy
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+GROUP_STATS = 'GET /v0.2/groups/{id}/'
+
+
+class InstrumentationTest(ServerTestCase):
+    def _record(self, instrumentation):
+        seen = []
+        for event in events.EVENTS:
+            instrumentation.subscribe(event, lambda event, info: seen.append((event, info)))
+        return seen
+
+    def test_events_describe_the_call(self):
+        instrumentation = Instrumentation(collect_metrics=False)
+        seen = self._record(instrumentation)
+        api = self.api(instrumentation=instrumentation)
+
+        api.Groups.GET(id=1)
+
+        self.assertEqual([event for event, info in seen], [events.REQUEST_START, events.RESPONSE_RECEIVED, events.DECODED])
+        start, received, decoded = [info for event, info in seen]
+        self.assertEqual((start['method'], start['uri'], start['attempt']), ('GET', self.server.url + 'v0.2/groups/1/', 0))
+        self.assertEqual(received['status'], 200)
+        self.assertGreaterEqual(received['elapsed'], received['ttfb'])
+        self.assertGreater(decoded['response_bytes'], 0)
+
+    def test_stats_per_endpoint(self):
+        instrumentation = Instrumentation()
+        api = self.api(instrumentation=instrumentation)
+
+        api.Groups.GET(id=1)
+        api.Groups.GET(id=2)
+        api.Groups({'name': 'web'}).CREATE()
+
+        stats = api.stats()['endpoints']
+        self.assertEqual(sorted(stats), [GROUP_STATS, 'POST /v0.2/groups/'])
+        self.assertEqual(stats[GROUP_STATS]['requests'], 2)
+        self.assertEqual(stats[GROUP_STATS]['latency_ms']['count'], 2)
+        self.assertEqual(stats[GROUP_STATS]['bytes_sent'], 0)
+        self.assertGreater(stats[GROUP_STATS]['bytes_received'], 0)
+        self.assertGreater(stats['POST /v0.2/groups/']['bytes_sent'], 0)
+
+        instrumentation.reset()
+        self.assertEqual(instrumentation.stats(), {})
+
+    def test_errors_and_retries_are_counted(self):
+        self.server.script('GET', GROUP, {'status': 503}, {'status': 404})
+        instrumentation = Instrumentation()
+        seen = self._record(instrumentation)
+        api = self.api(instrumentation=instrumentation, retry_policy=RetryPolicy(backoff_factor=0))
+
+        self.assertRaises(requests.HTTPError, api.Groups.GET, id=1)
+
+        stats = instrumentation.stats()[GROUP_STATS]
+        self.assertEqual((stats['requests'], stats['errors'], stats['retries']), (2, 2, 1))
+        retried = [info for event, info in seen if event == events.RETRIED]
+        self.assertEqual(len(retried), 1)
+        self.assertEqual((retried[0]['attempt'], retried[0]['reason']), (1, 503))
+
+    def test_callback_exceptions_are_ignored(self):
+        instrumentation = Instrumentation()
+
+        def fail(event, info):
+            raise RuntimeError('broken callback')
+
+        instrumentation.subscribe(events.REQUEST_START, fail)
+        api = self.api(instrumentation=instrumentation)
+
+        self.assertEqual(api.Groups.GET(id=1)['id'], 1)
+        self.assertEqual(instrumentation.stats()[GROUP_STATS]['requests'], 1)
+
+    def test_unsubscribe(self):
+        instrumentation = Instrumentation(collect_metrics=False)
+        seen = []
+        callback = lambda event, info: seen.append(event)
+        instrumentation.subscribe(events.REQUEST_START, callback)
+        instrumentation.unsubscribe(events.REQUEST_START, callback)
+
+        self.api(instrumentation=instrumentation).Groups.GET(id=1)
+
+        self.assertEqual(seen, [])
+
+    def test_unknown_event(self):
+        self.assertRaises(ValueError, Instrumentation().subscribe, 'request_sent', lambda event, info: None)
+
+
+class HelpersTest(unittest.TestCase):
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name('GET', 'https://api.stackdriver.com/v0.2/groups/67/'), GROUP_STATS)
+        self.assertEqual(endpoint_name('GET', 'https://api.stackdriver.com/v0.2/groups/67/members/?page=2'),
+                         'GET /v0.2/groups/{id}/members/')
+        self.assertEqual(endpoint_name('POST', 'https://api.stackdriver.com/v0.2/groups/'), 'POST /v0.2/groups/')
+
+    def test_histogram_percentile(self):
+        histogram = Histogram(bounds=(1, 10, 100, float('inf')))
+        self.assertIsNone(histogram.percentile(0.5))
+
+        for value in (0.5, 5, 5, 50, 5000):
+            histogram.add(value)
+
+        self.assertEqual(histogram.percentile(0.2), 1)
+        self.assertEqual(histogram.percentile(0.5), 10)
+        self.assertEqual(histogram.percentile(0.8), 100)
+        self.assertEqual(histogram.percentile(0.99), float('inf'))
+        self.assertEqual(histogram.as_dict()['count'], 5)
+        self.assertEqual(histogram.as_dict()['buckets'], {'le_1': 1, 'le_10': 2, 'le_100': 1, 'le_inf': 1})
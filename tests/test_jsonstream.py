@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from stackdriver.jsonstream import JSONStream
+
+BODY = json.dumps({
+    'meta': {'page': 1, 'pages': 2},
+    'data': [
+        {'id': 1, 'name': u'café ☃', 'weight': 1.5, 'big': -2.5e+30, 'small': 1E-7},
+        [True, False, None, 0, -0.25, 12345678901234567890],
+        'plain "quoted" \\ string',
+        -17,
+        3.25e10,
+    ],
+    'after': {'next': None},
+}, ensure_ascii=False).encode('utf-8')
+
+
+def split_at(body, *positions):
+    bounds = [0] + list(positions) + [len(body)]
+    return [body[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class JSONStreamTest(unittest.TestCase):
+    def test_whole_body(self):
+        stream = JSONStream([BODY])
+
+        self.assertTrue(stream.is_list)
+        self.assertEqual(stream['meta'], {'page': 1, 'pages': 2})
+        self.assertEqual(list(stream), json.loads(BODY.decode('utf-8'))['data'])
+        self.assertEqual(stream['after'], {'next': None})
+
+    def test_split_at_every_position(self):
+        expected = json.loads(BODY.decode('utf-8'))
+        for position in range(1, len(BODY)):
+            stream = JSONStream(split_at(BODY, position))
+            self.assertEqual(list(stream), expected['data'], 'split at %d' % position)
+            self.assertEqual(stream.envelope, {'meta': expected['meta'], 'after': expected['after']})
+
+    def test_one_byte_chunks(self):
+        stream = JSONStream([BODY[i:i + 1] for i in range(len(BODY))])
+
+        self.assertEqual(list(stream), json.loads(BODY.decode('utf-8'))['data'])
+
+    def test_numbers_cut_short(self):
+        for first, second, expected in [(b'[1.', b'5]', 1.5), (b'[1e', b'5]', 1e5), (b'[1.5e', b'+3]', 1.5e3),
+                                        (b'[-', b'2]', -2), (b'[12', b'34]', 1234), (b'[0.2', b'5 ]', 0.25)]:
+            stream = JSONStream([b'{"data": ' + first, second + b'}'])
+            self.assertEqual(list(stream), [expected], first + second)
+
+    def test_number_at_the_end_of_every_chunk(self):
+        chunks = [b'{"data": [1', b'0', b'.', b'2', b'5', b'e', b'-', b'1', b', 7', b']}']
+
+        self.assertEqual(list(JSONStream(chunks)), [1.025, 7])
+
+    def test_empty_array(self):
+        stream = JSONStream([b'{"data": [], "meta": {"total": 0}}'])
+
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream['meta'], {'total': 0})
+
+    def test_data_that_is_not_a_list(self):
+        stream = JSONStream([b'{"data": {"id": 1}}'])
+
+        self.assertFalse(stream.is_list)
+        self.assertEqual(stream['data'], {'id': 1})
+
+    def test_truncated_body(self):
+        stream = JSONStream([b'{"data": [1, 2'])
+
+        with self.assertRaises(ValueError):
+            list(stream)
+
+    def test_iterates_once_and_closes(self):
+        closed = []
+        stream = JSONStream([b'{"data": [1, 2]}'], on_close=lambda: closed.append(True))
+
+        items = iter(stream)
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(RuntimeError):
+            list(stream)
+        self.assertEqual(list(items), [2])
+        self.assertEqual(closed, [True])
@@ -0,0 +1,56 @@
+import requests
+
+from stackdriver.keypool import KeyPool, LEAST_USED
+from stackdriver.retry import RetryPolicy
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+KEYS = ['first-key-aaaa', 'second-key-bbbb', 'third-key-cccc']
+
+
+class KeyPoolTest(ServerTestCase):
+    def _keys_used(self):
+        return [call.headers['x-stackdriver-apikey'] for call in self.server.requests_to('GET', GROUP)]
+
+    def test_round_robin(self):
+        api = self.api(key_pool=KeyPool(KEYS))
+
+        for _ in range(6):
+            api.Groups.GET(id=1)
+
+        self.assertEqual(self._keys_used(), KEYS * 2)
+
+    def test_least_used(self):
+        pool = KeyPool(KEYS, strategy=LEAST_USED)
+        api = self.api(key_pool=pool)
+
+        for _ in range(6):
+            api.Groups.GET(id=1)
+
+        self.assertEqual(sorted(self._keys_used()), sorted(KEYS * 2))
+        self.assertTrue(all(key['in_flight'] == 0 for key in pool.stats().values()))
+
+    def test_throttled_key_is_rested(self):
+        self.server.script('GET', GROUP, {'status': 429, 'headers': {'Retry-After': '60'}})
+        pool = KeyPool(KEYS[:2])
+        api = self.api(key_pool=pool, retry_policy=RetryPolicy(backoff_factor=0))
+
+        for _ in range(3):
+            api.Groups.GET(id=1)
+
+        self.assertEqual(self._keys_used(), [KEYS[0], KEYS[1], KEYS[1], KEYS[1]])
+        stats = pool.stats()
+        self.assertEqual(stats['0:firs...']['throttled'], 1)
+        self.assertGreater(stats['0:firs...']['cooldown_remaining'], 50)
+
+    def test_throttled_call_is_raised_without_retry_policy(self):
+        self.server.script('GET', GROUP, {'status': 429, 'headers': {'Retry-After': '60'}})
+        pool = KeyPool(KEYS[:2])
+        api = self.api(key_pool=pool)
+
+        with self.assertRaises(requests.HTTPError):
+            api.Groups.GET(id=1)
+        api.Groups.GET(id=1)
+
+        self.assertEqual(self._keys_used(), [KEYS[0], KEYS[1]])
@@ -0,0 +1,85 @@
+import unittest
+
+from stackdriver.resultset import LazyObjectList
+
+
+class Wrapped(object):
+    def __init__(self, item):
+        self.item = item
+
+    def __eq__(self, other):
+        return isinstance(other, Wrapped) and other.item == self.item
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Wrapped(%r)' % self.item
+
+
+class LazyObjectListTest(unittest.TestCase):
+    def setUp(self):
+        self.wrapped = []
+
+    def _wrap(self, item):
+        self.wrapped.append(item)
+        return Wrapped(item)
+
+    def _list(self, size=5):
+        return LazyObjectList(list(range(size)), self._wrap)
+
+    def test_items_are_wrapped_when_accessed(self):
+        items = self._list()
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(self.wrapped, [])
+
+        self.assertEqual(items[2], Wrapped(2))
+        self.assertEqual(self.wrapped, [2])
+
+    def test_items_are_wrapped_once(self):
+        items = self._list()
+
+        self.assertIs(items[1], items[1])
+        list(items)
+        list(items)
+
+        self.assertEqual(sorted(self.wrapped), [0, 1, 2, 3, 4])
+
+    def test_negative_index(self):
+        items = self._list()
+
+        self.assertEqual(items[-1], Wrapped(4))
+        self.assertEqual(items[-5], Wrapped(0))
+        self.assertEqual(self.wrapped, [4, 0])
+
+    def test_index_out_of_range(self):
+        items = self._list()
+
+        self.assertRaises(IndexError, lambda: items[5])
+        self.assertRaises(IndexError, lambda: items[-6])
+        self.assertEqual(self.wrapped, [])
+
+    def test_slices_only_wrap_their_items(self):
+        items = self._list()
+
+        self.assertEqual(items[1:3], [Wrapped(1), Wrapped(2)])
+        self.assertEqual(items[::-2], [Wrapped(4), Wrapped(2), Wrapped(0)])
+        self.assertEqual(items[10:], [])
+        self.assertEqual(sorted(set(self.wrapped)), [0, 1, 2, 4])
+
+    def test_sequence_behaviour(self):
+        items = self._list()
+
+        self.assertIn(Wrapped(3), items)
+        self.assertEqual(items.index(Wrapped(3)), 3)
+        self.assertEqual(list(reversed(items))[0], Wrapped(4))
+        self.assertFalse(LazyObjectList([], self._wrap))
+
+    def test_equality(self):
+        items = self._list(3)
+
+        self.assertEqual(items, [Wrapped(0), Wrapped(1), Wrapped(2)])
+        self.assertEqual(items, self._list(3))
+        self.assertNotEqual(items, [Wrapped(0)])
+        self.assertNotEqual(items, (Wrapped(0), Wrapped(1), Wrapped(2)))
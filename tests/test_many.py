@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+
+import requests
+
+from . import APIKEY, ServerTestCase
+
+try:
+    import aiohttp
+    from stackdriver.asyncapi import AsyncStackApi
+except (ImportError, SyntaxError):
+    aiohttp = None
+
+GROUPS = '/v0.2/groups/'
+
+
+class ManyTest(ServerTestCase):
+    def _groups(self, api, count):
+        return [api.Groups({'name': 'web-%d' % i, 'conjunction': 'And', 'conditions': []}) for i in range(count)]
+
+    def test_create_many(self):
+        api = self.api()
+        groups = self._groups(api, 5)
+
+        results = api.create_many(groups, concurrency=3)
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([result.item for result in results], groups)
+        self.assertTrue(all(group.resource == '%s%d/' % (GROUPS, group.id) for group in groups))
+        self.assertEqual(len(self.server.requests_to('POST', GROUPS)), 5)
+
+    def test_create_failure_is_reported_on_its_item(self):
+        self.server.script('POST', GROUPS, {'status': 400, 'data': None, 'meta': {'error': 'Field validation error'}})
+        api = self.api()
+        groups = self._groups(api, 3)
+
+        results = api.create_many(groups, concurrency=1)
+
+        self.assertEqual([result.ok for result in results], [False, True, True])
+        self.assertIsInstance(results[0].error, requests.HTTPError)
+        self.assertNotIn('id', groups[0])
+        self.assertIn('id', groups[1])
+
+    def test_update_many(self):
+        self.server.script('PUT', '/v0.2/groups/1/', {'status': 404})
+        api = self.api()
+        groups = [result.result for result in api.fetch_many(['%s%d/' % (GROUPS, id) for id in range(3)])]
+        for group in groups:
+            group.name = 'renamed'
+
+        results = api.update_many(groups)
+
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertEqual(results[1].error.response.status_code, 404)
+        self.assertEqual([call.body for call in self.server.requests_to('PUT', '/v0.2/groups/0/')], [{'name': 'renamed'}])
+
+    def test_delete_many(self):
+        api = self.api()
+        groups = [result.result for result in api.fetch_many(['%s%d/' % (GROUPS, id) for id in range(4)])]
+
+        results = list(api.delete_many(groups, stream=True))
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertTrue(all('deleted_epoch' in group for group in groups))
+        self.assertEqual(len([call for call in self.server.request_log if call.method == 'DELETE']), 4)
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class AsyncManyTest(ServerTestCase):
+    def _run(self, func):
+        async def main():
+            async with AsyncStackApi(self.server.url, apikey=APIKEY) as api:
+                return await func(api)
+
+        return asyncio.run(main())
+
+    def test_create_and_delete_many(self):
+        async def create_and_delete(api):
+            groups = [api.Groups({'name': 'web-%d' % i}) for i in range(5)]
+            created = await api.create_many(groups, concurrency=2)
+            deleted = await api.delete_many(groups)
+            return groups, created, deleted
+
+        groups, created, deleted = self._run(create_and_delete)
+
+        self.assertEqual([result.item for result in created], groups)
+        self.assertTrue(all(result.ok for result in created + deleted))
+        self.assertTrue(all('deleted_epoch' in group for group in groups))
+        self.assertEqual(len(self.server.requests_to('POST', GROUPS)), 5)
+
+    def test_update_many(self):
+        self.server.script('PUT', '/v0.2/groups/1/', {'status': 404})
+
+        async def update(api):
+            fetched = await api.fetch_many(['%s%d/' % (GROUPS, id) for id in range(3)])
+            groups = [result.result for result in fetched]
+            for group in groups:
+                group.name = 'renamed'
+            return await api.update_many(groups)
+
+        results = self._run(update)
+
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertIsInstance(results[1].error, requests.HTTPError)
+        self.assertEqual(self.server.requests_to('PUT', '/v0.2/groups/2/')[0].body, {'name': 'renamed'})
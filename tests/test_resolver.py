@@ -0,0 +1,106 @@
+import threading
+import time
+
+import requests
+
+from stackdriver.resolver import Resolver
+from stackdriver.stackapi import AnonStackObject
+
+from . import ServerTestCase
+
+RESOLVE = '/v0.2/resolve/'
+
+
+class ResolverTest(ServerTestCase):
+    def _resolved_names(self):
+        return [call.body['name'] for call in self.server.requests_to('POST', RESOLVE)]
+
+    def test_answers_are_remembered(self):
+        resolver = Resolver(self.api())
+
+        resources = resolver.resolve('web-1')
+
+        self.assertEqual(len(resources), 1)
+        self.assertIsInstance(resources[0], AnonStackObject)
+        self.assertIs(resolver.resolve('web-1'), resources)
+        self.assertIn('web-1', resolver)
+        self.assertEqual(self._resolved_names(), ['web-1'])
+        self.assertEqual((resolver.hits, resolver.misses), (1, 1))
+
+    def test_empty_answers_are_remembered(self):
+        self.server.script('POST', RESOLVE, {'data': []})
+        resolver = Resolver(self.api())
+
+        self.assertEqual(resolver.resolve('missing'), [])
+        self.assertEqual(resolver.resolve('missing'), [])
+        self.assertEqual(self._resolved_names(), ['missing'])
+
+    def test_resolve_many_only_calls_for_missing_names(self):
+        resolver = Resolver(self.api(), concurrency=4)
+        resolver.resolve('web-1')
+
+        resolved = resolver.resolve_many(['web-1', 'web-2', 'web-3', 'web-2'])
+
+        self.assertEqual(sorted(resolved), ['web-1', 'web-2', 'web-3'])
+        self.assertTrue(all(len(resources) == 1 for resources in resolved.values()))
+        self.assertEqual(sorted(self._resolved_names()), ['web-1', 'web-2', 'web-3'])
+        self.assertEqual(len(resolver), 3)
+
+    def test_failures(self):
+        resolver = Resolver(self.api(), concurrency=1)
+
+        self.server.script('POST', RESOLVE, {'status': 500})
+        self.assertRaises(requests.HTTPError, resolver.resolve_many, ['web-1', 'web-2'])
+        self.assertNotIn('web-1', resolver)
+        self.assertIn('web-2', resolver)
+
+        self.server.script('POST', RESOLVE, {'status': 500})
+        resolved = resolver.resolve_many(['web-1', 'web-2', 'web-3'], ignore_errors=True)
+        self.assertEqual(sorted(resolved), ['web-2', 'web-3'])
+
+    def test_names_expire(self):
+        resolver = Resolver(self.api(), ttl=0.05)
+
+        resolver.resolve('web-1')
+        time.sleep(0.1)
+        resolver.resolve('web-1')
+
+        self.assertEqual(self._resolved_names(), ['web-1', 'web-1'])
+
+    def test_least_recently_used_names_are_dropped(self):
+        resolver = Resolver(self.api(), max_entries=2)
+
+        resolver.resolve('web-1')
+        resolver.resolve('web-2')
+        resolver.resolve('web-1')
+        resolver.resolve('web-3')
+
+        self.assertIn('web-1', resolver)
+        self.assertNotIn('web-2', resolver)
+        self.assertEqual(len(resolver), 2)
+
+    def test_concurrent_lookups_share_one_call(self):
+        self.server.script('POST', RESOLVE, {'data': [self.resource('instances', 1)], 'delay': 0.3})
+        resolver = Resolver(self.api())
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve('web-1'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self._resolved_names(), ['web-1'])
+        self.assertEqual(resolver.stats()['coalesced'], 4)
+
+    def test_invalidate(self):
+        resolver = Resolver(self.api())
+        resolver.resolve_many(['web-1', 'web-2'])
+
+        resolver.invalidate('web-1')
+        self.assertNotIn('web-1', resolver)
+        self.assertIn('web-2', resolver)
+
+        resolver.invalidate()
+        self.assertEqual(len(resolver), 0)
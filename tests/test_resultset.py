@@ -0,0 +1,109 @@
+import time
+
+from stackdriver.resultset import ResultSet
+from stackdriver.stackapi import AnonStackObject
+
+from . import ServerTestCase
+
+GROUPS = '/v0.2/groups/'
+
+
+class ResultSetTest(ServerTestCase):
+    def setUp(self):
+        super(ResultSetTest, self).setUp()
+        self.addCleanup(setattr, self.server, 'items', self.server.items)
+
+    def _pages_requested(self):
+        return [call.query.get('page', '1') for call in self.server.requests_to('GET', GROUPS)]
+
+    def test_pages_are_fetched_as_iteration_reaches_them(self):
+        groups = self.api().Groups.LIST()
+
+        self.assertIsInstance(groups, ResultSet)
+        self.assertEqual(self._pages_requested(), ['1'])
+
+        items = iter(groups)
+        for _ in range(10):
+            next(items)
+        self.assertEqual(self._pages_requested(), ['1'])
+
+        self.assertEqual(next(items)['id'], 10)
+        self.assertEqual(self._pages_requested(), ['1', '2'])
+
+    def test_iterates_every_item_of_every_page(self):
+        groups = self.api().Groups.LIST()
+
+        ids = [group.id for group in groups]
+
+        self.assertEqual(ids, list(range(20)))
+        self.assertTrue(all(isinstance(group, AnonStackObject) for group in groups))
+        self.assertEqual(groups.total, 20)
+
+    def test_iterates_again_from_the_first_page(self):
+        groups = self.api().Groups.LIST()
+
+        self.assertEqual([group.id for group in groups], list(range(20)))
+        self.assertEqual([group.id for group in groups], list(range(20)))
+        self.assertEqual(self._pages_requested(), ['1', '2', '2'])
+
+    def test_list_fetches_every_page_once(self):
+        groups = self.api().Groups.LIST()
+
+        self.assertEqual(len(list(groups)), 20)
+        self.assertEqual(len(list(groups)), 20)
+        self.assertEqual(self._pages_requested(), ['1', '2'])
+
+    def test_prefetch_requests_the_next_page_early(self):
+        groups = self.api().Groups.LIST(prefetch=True)
+
+        first = next(iter(groups))
+        deadline = time.time() + 2
+        while len(self._pages_requested()) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(first['id'], 0)
+        self.assertEqual(self._pages_requested(), ['1', '2'])
+        self.assertEqual([group.id for group in groups], list(range(20)))
+
+    def test_params_are_kept_on_later_pages(self):
+        groups = self.api().Groups.LIST(params={'per_page': 7})
+
+        self.assertEqual(len(list(groups)), 20)
+        calls = self.server.requests_to('GET', GROUPS)
+        self.assertEqual([call.query for call in calls],
+                         [{'per_page': '7'}, {'per_page': '7', 'page': '2'}, {'per_page': '7', 'page': '3'}])
+
+    def test_next_links_are_followed(self):
+        self.server.script('GET', GROUPS, {'data': [self.resource('groups', 100)],
+                                           'meta': {'next': self.server.url + 'v0.2/groups/?page=2'}})
+
+        ids = [group.id for group in self.api().Groups.LIST()]
+
+        self.assertEqual(ids, [100] + list(range(10, 20)))
+
+    def test_list_behaviour(self):
+        groups = self.api().Groups.LIST()
+
+        self.assertTrue(groups)
+        self.assertEqual(len(groups), 20)
+        self.assertEqual(groups[15]['id'], 15)
+        self.assertEqual(groups[-1]['id'], 19)
+        self.assertEqual([group.id for group in groups[8:12]], [8, 9, 10, 11])
+        self.assertEqual([group.id for group in groups.all()], list(range(20)))
+        self.assertEqual(self._pages_requested(), ['1', '2'])
+
+    def test_truth_comes_from_the_first_page(self):
+        self.server.items = 0
+
+        groups = self.api().Groups.LIST()
+
+        self.assertFalse(groups)
+        self.assertEqual(len(groups), 0)
+        self.assertEqual(self._pages_requested(), ['1'])
+
+    def test_stream(self):
+        groups = self.api().Groups.LIST(stream=True)
+
+        self.assertEqual([group.id for group in groups], list(range(20)))
+        self.assertEqual([group.id for group in groups], list(range(20)))
+        self.assertEqual(self._pages_requested(), ['1', '2', '1', '2'])
@@ -0,0 +1,58 @@
+import time
+
+import requests
+
+from stackdriver.retry import RetryPolicy
+
+from . import ServerTestCase
+
+GROUP = '/v0.2/groups/1/'
+GROUPS = '/v0.2/groups/'
+
+
+class RetryTest(ServerTestCase):
+    def test_429_is_retried(self):
+        self.server.script('GET', GROUP, {'status': 429, 'headers': {'Retry-After': '0'}})
+        api = self.api(retry_policy=RetryPolicy(backoff_factor=0))
+
+        group = api.Groups.GET(id=1)
+
+        self.assertEqual(group['id'], 1)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 2)
+
+    def test_retry_after_is_respected(self):
+        self.server.script('GET', GROUP, {'status': 429, 'headers': {'Retry-After': '0.3'}})
+        api = self.api(retry_policy=RetryPolicy(backoff_factor=0))
+
+        start = time.time()
+        api.Groups.GET(id=1)
+
+        self.assertGreaterEqual(time.time() - start, 0.3)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.script('GET', GROUP, *[{'status': 503}] * 3)
+        api = self.api(retry_policy=RetryPolicy(max_retries=2, backoff_factor=0))
+
+        with self.assertRaises(requests.HTTPError) as raised:
+            api.Groups.GET(id=1)
+
+        self.assertEqual(raised.exception.response.status_code, 503)
+        self.assertEqual(len(self.server.requests_to('GET', GROUP)), 3)
+
+    def test_post_is_not_retried(self):
+        self.server.script('POST', GROUPS, {'status': 503})
+        api = self.api(retry_policy=RetryPolicy(backoff_factor=0))
+
+        with self.assertRaises(requests.HTTPError):
+            api.Groups({'name': 'web'}).CREATE()
+
+        self.assertEqual(len(self.server.requests_to('POST', GROUPS)), 1)
+
+    def test_post_is_retried_when_allowed(self):
+        self.server.script('POST', GROUPS, {'status': 503})
+        api = self.api(retry_policy=RetryPolicy(backoff_factor=0, methods=['POST']))
+
+        group = api.Groups({'name': 'web'}).CREATE()
+
+        self.assertTrue(group['resource'])
+        self.assertEqual(len(self.server.requests_to('POST', GROUPS)), 2)
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+
+from stackdriver.snapshot import Snapshot
+
+from . import ServerTestCase
+
+GROUPS = '/v0.2/groups/'
+
+
+class SnapshotTest(ServerTestCase):
+    def setUp(self):
+        super(SnapshotTest, self).setUp()
+        self.server.items = 20
+        self.addCleanup(setattr, self.server, 'items', 20)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'groups.ndjson.gz')
+
+    def test_later_syncs_ask_for_changes(self):
+        api = self.api()
+        Snapshot(self.path).sync(api.Groups)
+        self.server.reset()
+        self.server.script('GET', GROUPS, {'data': [dict(self.resource('groups', 3), name='renamed'),
+                                                    dict(self.resource('groups', 4), deleted_epoch=1)]})
+
+        items = Snapshot(self.path).sync(api.Groups)
+
+        self.assertIn('modified_since', self.server.requests_to('GET', GROUPS)[0].query)
+        self.assertEqual(len(items), 19)
+        self.assertEqual([item.name for item in items if item.id == 3], ['renamed'])
+
+    def test_ignored_since_rebuilds(self):
+        api = self.api()
+        self.assertEqual(len(Snapshot(self.path).sync(api.Groups)), 20)
+
+        # the fake server ignores modified_since and lists everything, minus what was deleted
+        self.server.items = 15
+        items = Snapshot(self.path).sync(api.Groups)
+
+        self.assertEqual(sorted(item.id for item in items), list(range(15)))